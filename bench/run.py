@@ -0,0 +1,266 @@
+"""
+Benchmarks the form walkers on synthetic forms.
+
+    python -m bench.run                          # all tiers, JSON to stdout
+    python -m bench.run --tier small --out a.json
+    python -m bench.run --compare a.json b.json  # per-benchmark speedups
+"""
+
+import argparse
+import inspect
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from form.answer import get_subform_answers
+from form.constant import form_context_split_str
+from form.defs import (
+    collect_visible_required_fields_from_phases,
+    get_form_def,
+    reset_required_field_cache,
+)
+from form.dependency import form_dep_data
+from form.form import walk_form
+
+from .synthetic import generate_form
+
+# The runner only uses APIs the baseline already has, or falls back to them,
+# so the same runner times the trees before and after a change.
+try:
+    from form.answer import AnswerStore
+except ImportError:
+    AnswerStore = None  # type: ignore[assignment,misc]
+try:
+    from form.defs import form_defs_cache
+except ImportError:
+    from form.defs import form_field_defs_cache as form_defs_cache  # type: ignore
+
+# the baseline get_form_def always caches, uncached lookups clear it instead
+_HAS_USE_CACHE = "use_cache" in inspect.signature(get_form_def).parameters
+
+TIERS: Dict[str, Dict[str, Any]] = {
+    "small": dict(phases=2, sections=2, fields=5, options=4, trigger_depth=1),
+    "medium": dict(
+        phases=3, sections=4, fields=8, options=8, trigger_depth=2, subform_rows=5
+    ),
+    "large": dict(
+        phases=4,
+        sections=5,
+        fields=10,
+        options=20,
+        trigger_depth=2,
+        subform_rows=10,
+        fileselects=2,
+    ),
+    "wide-options": dict(
+        phases=2, sections=2, fields=6, options=1000, trigger_depth=1, dep_density=0.5
+    ),
+    "deep-triggers": dict(
+        phases=1,
+        sections=2,
+        fields=6,
+        options=3,
+        trigger_depth=5,
+        trigger_rate=0.5,
+        dep_density=0.2,
+    ),
+}
+
+
+def _nodes(form: dict) -> Iterator[Tuple[dict, str]]:
+    """
+    Yields every phase, section and field of a form with its context, subform
+    entries resolved to their first row.
+    """
+    stack: List[Tuple[dict, str, str]] = [
+        (phase, form["id"], "phase") for phase in reversed(form.get("phases", []))
+    ]
+    while stack:
+        node, parent_context, kind = stack.pop()
+        context = f"{parent_context}{form_context_split_str}{node.get('id')}"
+        yield node, context
+        children: List[Tuple[dict, str, str]] = []
+        if kind == "phase":
+            children = [(s, context, "section") for s in node.get("sections", [])]
+        elif kind == "section":
+            children = [(f, context, "field") for f in node.get("fields", [])]
+        else:
+            triggers = list(node.get("triggers", []))
+            for opt in node.get("options", []):
+                triggers.extend(opt.get("triggers", []))
+            children = [(t, parent_context, "section") for t in triggers]
+            entry = f"{context}{form_context_split_str}row0"
+            children += [(p, entry, "phase") for p in node.get("phases", [])]
+        stack.extend(reversed(children))
+
+
+def _definition_key(context: str) -> str:
+    # get_form_def looks definitions up with "*" in place of subform entries
+    return context.replace(
+        f"{form_context_split_str}row0{form_context_split_str}",
+        f"{form_context_split_str}*{form_context_split_str}",
+    )
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "best": min(timings),
+        "mean": sum(timings) / len(timings),
+        "repeat": repeat,
+    }
+
+
+def run_tier(params: Dict[str, Any], repeat: int, seed: int) -> Dict[str, Any]:
+    """
+    Times each benchmark on one generated form; seconds per run.
+    """
+    form, answers, answersWRTMetadata = generate_form(seed=seed, **params)
+    nodes = list(_nodes(form))
+    with_deps = [(node, context) for node, context in nodes if node.get("dependency")]
+    keys = [_definition_key(context) for _, context in nodes]
+    subforms = [
+        context for node, context in nodes if node.get("type") == "subformwtable"
+    ]
+
+    def dep_data() -> None:
+        for node, context in with_deps:
+            form_dep_data(form, node, context, answers)
+
+    def form_defs(use_cache: bool) -> Callable[[], None]:
+        def run() -> None:
+            for key in keys:
+                if _HAS_USE_CACHE:
+                    get_form_def(key, form, use_cache=use_cache)
+                    continue
+                if not use_cache:
+                    form_defs_cache.clear()
+                get_form_def(key, form)
+
+        return run
+
+    def subform_answers(source: Any) -> Callable[[], None]:
+        def run() -> None:
+            for context in subforms:
+                get_subform_answers(context, source)
+
+        return run
+
+    def required_fields() -> None:
+        reset_required_field_cache()
+        collect_visible_required_fields_from_phases(
+            form, form["phases"], form["id"], answers
+        )
+
+    form_defs_cache.clear()
+    results: Dict[str, Any] = {
+        "walk_form": _time(
+            lambda: walk_form(form, answers, answersWRTMetadata), repeat
+        ),
+        "form_dep_data": _time(dep_data, repeat),
+        "get_form_def": _time(form_defs(True), repeat),
+        "get_form_def_uncached": _time(form_defs(False), repeat),
+        "get_subform_answers": _time(subform_answers(answers), repeat),
+        "collect_visible_required_fields_from_phases": _time(
+            required_fields, repeat
+        ),
+    }
+    if AnswerStore is not None:
+        results["get_subform_answers_store"] = _time(
+            subform_answers(AnswerStore(answers)), repeat
+        )
+    return {
+        "params": dict(params, seed=seed),
+        "size": {
+            "nodes": len(nodes),
+            "dependencies": len(with_deps),
+            "answers": len(answers),
+            "form_bytes": len(json.dumps(form)),
+        },
+        "results": results,
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(tiers: List[str], repeat: int, seed: int) -> Dict[str, Any]:
+    return {
+        "meta": {
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "tiers": {tier: run_tier(TIERS[tier], repeat, seed) for tier in tiers},
+    }
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> None:
+    """
+    Prints the best time of each benchmark in both runs and the speedup.
+    """
+    print(f"{'tier':<14} {'benchmark':<46} {'old':>10} {'new':>10} {'speedup':>8}")
+    for tier, data in new["tiers"].items():
+        old_results = old["tiers"].get(tier, {}).get("results", {})
+        for name, timing in data["results"].items():
+            if name not in old_results:
+                continue
+            before, after = old_results[name]["best"], timing["best"]
+            speedup = before / after if after else float("inf")
+            print(
+                f"{tier:<14} {name:<46} {before:>10.5f} {after:>10.5f} "
+                f"{speedup:>7.2f}x"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--tier", action="append", choices=sorted(TIERS), help="default: all tiers"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the JSON results to this file")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("OLD", "NEW"),
+        help="compare two result files instead of running",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        old, new = (json.loads(Path(p).read_text()) for p in args.compare)
+        compare(old, new)
+        return
+
+    results = run(args.tier or list(TIERS), args.repeat, args.seed)
+    encoded = json.dumps(results, indent=2)
+    if args.out:
+        Path(args.out).write_text(encoded + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(encoded + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+from form.constant import form_context_split_str
+
+CHOICE_TYPES = ["radio", "checkbox", "dropdown-single-select", "dropdown-multi-select"]
+TEXT_TYPES = ["text", "textarea", "number", "password"]
+
+
+class _Generator:
+    """
+    Builds one synthetic form with answers; see generate_form.
+    """
+
+    def __init__(
+        self,
+        phases: int,
+        sections: int,
+        fields: int,
+        options: int,
+        trigger_depth: int,
+        trigger_rate: float,
+        subform_rows: int,
+        dep_density: float,
+        fileselects: int,
+        seed: int,
+    ) -> None:
+        self.phases = phases
+        self.sections = sections
+        self.fields = fields
+        self.options = options
+        self.trigger_depth = trigger_depth
+        self.trigger_rate = trigger_rate
+        self.subform_rows = subform_rows
+        self.dep_density = dep_density
+        self.fileselects = fileselects
+        self.rng = random.Random(seed)
+        self.form_id = "form"
+        self.answers: Dict[str, List[Any]] = {}
+        self.answersWRTMetadata: Dict[str, Any] = {}
+        self._counter = 0
+
+    def next_id(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def context(self, path: List[str]) -> str:
+        return form_context_split_str.join([self.form_id] + path)
+
+    def dependencies(self, targets: List[Dict[str, Any]]) -> List[dict]:
+        """
+        With probability dep_density, a dependency on an earlier field.
+        """
+        rng = self.rng
+        if not targets or rng.random() >= self.dep_density:
+            return []
+        target = rng.choice(targets)
+        if target["kind"] == "choice":
+            if rng.random() < 0.6:
+                values = rng.sample(target["values"], k=min(2, len(target["values"])))
+                return [
+                    {
+                        "type": "visibility",
+                        "path": target["path"],
+                        "answers": [[value] for value in values],
+                    }
+                ]
+            return [{"type": "options", "path": target["path"]}]
+        if target["kind"] == "file":
+            dep: Dict[str, Any] = {"type": "files", "path": target["path"]}
+            if rng.random() < 0.5:
+                dep["exclude"] = [rng.choice(targets)["path"]]
+            return [dep]
+        if rng.random() < 0.5:
+            return [{"type": "visibility", "path": target["path"]}]
+        return [
+            {"type": "visibility", "path": target["path"], "answers": [["a"], ["b"]]}
+        ]
+
+    def section(
+        self,
+        path: List[str],
+        depth: int,
+        targets: List[Dict[str, Any]],
+        in_subform: bool,
+    ) -> dict:
+        section_id = self.next_id("s")
+        section: Dict[str, Any] = {
+            "id": section_id,
+            "title": f"Section {section_id}",
+            "fields": [],
+        }
+        if self.rng.random() < 0.4:
+            section["metadata"] = {"id": f"m{section_id}"}
+        dependency = self.dependencies(targets)
+        if dependency:
+            section["dependency"] = dependency
+
+        section_path = path + [section_id]
+        count = self.fields if depth == 0 else max(1, self.fields // 2)
+        for position in range(count):
+            section["fields"].append(
+                self.field(path, section_path, depth, targets, in_subform, position)
+            )
+        return section
+
+    def trigger(
+        self,
+        path: List[str],
+        depth: int,
+        targets: List[Dict[str, Any]],
+        in_subform: bool,
+    ) -> dict:
+        # triggered sections hang off the enclosing section's context
+        return dict(self.section(path, depth, targets, in_subform), type="section")
+
+    def field_type(self, depth: int, in_subform: bool, position: int) -> str:
+        top_level = depth == 0 and not in_subform
+        if top_level and position == 0 and self.subform_rows:
+            return "subformwtable"
+        if top_level and 1 <= position <= 2 * self.fileselects:
+            return "file" if position % 2 else "fileselect"
+        if self.rng.random() < 0.5:
+            return self.rng.choice(CHOICE_TYPES)
+        return self.rng.choice(TEXT_TYPES)
+
+    def field(
+        self,
+        section_parent_path: List[str],
+        section_path: List[str],
+        depth: int,
+        targets: List[Dict[str, Any]],
+        in_subform: bool,
+        position: int,
+    ) -> dict:
+        rng = self.rng
+        field_id = self.next_id("f")
+        field_type = self.field_type(depth, in_subform, position)
+        field: Dict[str, Any] = {
+            "id": field_id,
+            "type": field_type,
+            "title": f"Field {field_id}",
+        }
+        if rng.random() < 0.6:
+            field["metadata"] = {"id": f"m{field_id}"}
+        if rng.random() < 0.3:
+            field["required"] = True
+        dependency = self.dependencies(targets)
+        if dependency:
+            field["dependency"] = dependency
+
+        field_path = section_path + [field_id]
+        context = self.context(field_path)
+        can_trigger = depth < self.trigger_depth
+
+        if field_type in CHOICE_TYPES:
+            values = [f"v{i}" for i in range(self.options)]
+            field["options"] = [{"label": value, "value": value} for value in values]
+            # at most two options trigger a section, so size stays linear in options
+            if values and can_trigger and rng.random() < self.trigger_rate:
+                for option in rng.sample(field["options"], k=min(2, len(values))):
+                    option["triggers"] = [
+                        self.trigger(section_path, depth + 1, targets, in_subform)
+                    ]
+            if values and rng.random() < 0.7:
+                single = field_type in ("radio", "dropdown-single-select")
+                k = 1 if single else rng.randint(1, len(values))
+                self.answers[context] = rng.sample(values, k=k)
+            targets.append({"kind": "choice", "path": field_path, "values": values})
+
+        elif field_type in TEXT_TYPES:
+            if can_trigger and rng.random() < self.trigger_rate:
+                field["triggers"] = [
+                    self.trigger(section_path, depth + 1, targets, in_subform)
+                ]
+            if rng.random() < 0.7:
+                self.answers[context] = [rng.choice(["a", "b", "c", ""])]
+            targets.append({"kind": "text", "path": field_path})
+
+        elif field_type == "file":
+            self.answers[context] = [
+                {"id": f"file{i}_{field_id}", "name": f"document{i}.pdf"}
+                for i in range(3)
+            ]
+            targets.append({"kind": "file", "path": field_path})
+
+        elif field_type == "fileselect":
+            uploads = [t for t in targets if t["kind"] == "file"]
+            if uploads:
+                upload_id = uploads[-1]["path"][-1]
+                field["dependency"] = [{"type": "files", "path": uploads[-1]["path"]}]
+                self.answers[context] = [f"file0_{upload_id}", f"file2_{upload_id}"]
+            field["triggers"] = [
+                self.trigger(section_path, depth + 1, targets, in_subform)
+            ]
+
+        elif field_type == "subformwtable":
+            self.subform(field, field_path, context)
+
+        metadata_id = field.get("metadata", {}).get("id")
+        if metadata_id and field_type != "subformwtable" and rng.random() < 0.3:
+            self.answersWRTMetadata[metadata_id] = [f"wrt_{field_id}"]
+        return field
+
+    def subform(self, field: dict, field_path: List[str], context: str) -> None:
+        field["metadata"] = {"id": f"m{field['id']}"}
+        entry_path = field_path + ["*"]
+        entry_targets: List[Dict[str, Any]] = []
+        phase_id = self.next_id("p")
+        field["phases"] = [
+            {
+                "id": phase_id,
+                "sections": [
+                    self.section(entry_path + [phase_id], 0, entry_targets, True)
+                    for _ in range(2)
+                ],
+            }
+        ]
+
+        # the entry sections wrote their answers under "*"; spread them over rows
+        rows = [f"row{i}" for i in range(self.subform_rows)]
+        star = f"{context}{form_context_split_str}*{form_context_split_str}"
+        for key in [k for k in self.answers if k.startswith(star)]:
+            value = self.answers.pop(key)
+            rest = key[len(star) :]
+            for row in rows:
+                if self.rng.random() < 0.8:
+                    self.answers[
+                        f"{context}{form_context_split_str}{row}"
+                        f"{form_context_split_str}{rest}"
+                    ] = value
+        self.answersWRTMetadata[field["metadata"]["id"]] = {row: {} for row in rows[:2]}
+
+    def form(self) -> dict:
+        form: Dict[str, Any] = {"id": self.form_id, "phases": []}
+        targets: List[Dict[str, Any]] = []
+        for _ in range(self.phases):
+            phase_id = self.next_id("p")
+            phase: Dict[str, Any] = {"id": phase_id, "sections": []}
+            if self.rng.random() < 0.5:
+                phase["metadata"] = {"id": f"m{phase_id}"}
+            dependency = self.dependencies(targets)
+            if dependency:
+                phase["dependency"] = dependency
+            for _ in range(self.sections):
+                phase["sections"].append(self.section([phase_id], 0, targets, False))
+            form["phases"].append(phase)
+        return form
+
+
+def generate_form(
+    phases: int = 2,
+    sections: int = 3,
+    fields: int = 6,
+    options: int = 4,
+    trigger_depth: int = 1,
+    trigger_rate: float = 0.3,
+    subform_rows: int = 3,
+    dep_density: float = 0.3,
+    fileselects: int = 1,
+    seed: int = 0,
+    answersWRTMetadata: Optional[bool] = True,
+) -> Tuple[dict, Dict[str, List[Any]], Optional[Dict[str, Any]]]:
+    """
+    Generates a form definition with matching answers, deterministically for
+    a given set of arguments.
+
+    Args:
+        phases: Top-level phases.
+        sections: Sections per phase.
+        fields: Fields per top-level section; triggered sections get half.
+        options: Options per choice field.
+        trigger_depth: How many levels of triggered sections may nest.
+        trigger_rate: Probability that a choice or text field triggers sections.
+        subform_rows: Entries answered per subformwtable; 0 adds no subforms.
+        dep_density: Probability that a node depends on an earlier field.
+        fileselects: File upload / fileselect field pairs per top-level section.
+        seed: Seed of the random generator.
+        answersWRTMetadata: Whether to also generate metadata answers.
+
+    Returns:
+        (form, answers, answersWRTMetadata)
+    """
+    generator = _Generator(
+        phases,
+        sections,
+        fields,
+        options,
+        trigger_depth,
+        trigger_rate,
+        subform_rows,
+        dep_density,
+        fileselects,
+        seed,
+    )
+    form = generator.form()
+    wrt = generator.answersWRTMetadata if answersWRTMetadata else None
+    return form, generator.answers, wrt
@@ -0,0 +1,228 @@
+import asyncio
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from threading import Lock
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from .compiled import walk_compiled
+from .form import requested_outputs, walk_form
+from .plan import FormPlan, compile_form
+
+_Outputs = Tuple[
+    Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any]
+]
+
+
+# thread pool of the walks given no executor, created on first use
+_default_executor: Optional[ThreadPoolExecutor] = None
+_default_executor_lock = Lock()
+
+
+def _get_default_executor() -> ThreadPoolExecutor:
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = ThreadPoolExecutor(thread_name_prefix="walk_form")
+        return _default_executor
+
+
+async def _run(
+    executor: Optional[Executor],
+    timeout: Optional[float],
+    fn: Callable[..., _Outputs],
+    *args: Any,
+    on_done: Optional[Callable[[], None]] = None,
+) -> _Outputs:
+    """
+    Runs fn in the executor, giving up after timeout seconds.
+
+    Cancelling the awaiting task (or timing out) cancels the executor job if it
+    has not started yet; a job already running runs to completion in the
+    background, its result discarded. on_done is called on the event loop once
+    the job itself is over, run or cancelled, however the await ended.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        job = (executor or _get_default_executor()).submit(fn, *args)
+    except BaseException:
+        if on_done is not None:
+            on_done()
+        raise
+
+    if on_done is not None:
+
+        def job_done(_: Future) -> None:
+            try:
+                loop.call_soon_threadsafe(on_done)
+            except RuntimeError:
+                # the loop is closed, no one is left to notify
+                pass
+
+        job.add_done_callback(job_done)
+
+    future = asyncio.wrap_future(job)
+    if timeout is None:
+        return await future
+    return await asyncio.wait_for(future, timeout)
+
+
+async def walk_form_async(
+    form: Union[dict, FormPlan],
+    answers: dict,
+    answersWRTMetadata: Optional[dict] = None,
+    outputs: Optional[Iterable[str]] = None,
+    executor: Optional[Executor] = None,
+    timeout: Optional[float] = None,
+    limiter: Optional[asyncio.Semaphore] = None,
+) -> _Outputs:
+    """
+    Walks a form in an executor so the event loop stays responsive.
+
+    Args:
+        form: The form definition, or a plan from compile_form.
+        answers: The answers of the submission.
+        answersWRTMetadata: Metadata answers, as in walk_form.
+        outputs: Views to compute, as in walk_form.
+        executor: Thread or process pool to walk in; None uses a thread pool
+            shared by the walks of this module. With a process pool, form and
+            answers are pickled per call.
+        timeout: Seconds to wait for the result before raising
+            asyncio.TimeoutError.
+        limiter: Semaphore shared by callers to cap the walks in flight; the
+            timeout does not include the time spent waiting for it. A walk
+            holds its slot until its executor job is over, also when the
+            timeout or a cancellation ended the wait for it first.
+
+    Returns:
+        The five walk_form outputs.
+    """
+    requested = requested_outputs(outputs)
+    fn: Callable[..., _Outputs]
+    args: Tuple[Any, ...]
+    if isinstance(form, FormPlan):
+        fn, args = walk_compiled, (form, answers, answersWRTMetadata, requested)
+    else:
+        fn, args = walk_form, (form, answers, answersWRTMetadata, requested)
+
+    if limiter is None:
+        return await _run(executor, timeout, fn, *args)
+    await limiter.acquire()
+    return await _run(executor, timeout, fn, *args, on_done=limiter.release)
+
+
+async def _aenumerate(
+    answers_iterable: Union[Iterable[dict], AsyncIterable[dict]],
+) -> AsyncIterator[Tuple[int, dict]]:
+    index = 0
+    if isinstance(answers_iterable, AsyncIterable):
+        async for answers in answers_iterable:
+            yield index, answers
+            index += 1
+    else:
+        for answers in answers_iterable:
+            yield index, answers
+            index += 1
+
+
+async def walk_forms_async(
+    form: Union[dict, FormPlan],
+    answers_iterable: Union[Iterable[dict], AsyncIterable[dict]],
+    answersWRTMetadata: Optional[dict] = None,
+    executor: Optional[Executor] = None,
+    concurrency: int = 4,
+    timeout: Optional[float] = None,
+    ordered: bool = True,
+    outputs: Optional[Iterable[str]] = None,
+) -> AsyncIterator[Any]:
+    """
+    Walks many submissions of one form in an executor, as an async iterator.
+
+    The form is compiled once. At most concurrency submissions are in flight;
+    the next submission is only read from answers_iterable once a slot frees
+    up, so a slow consumer or a slow walk holds back the producer instead of
+    queueing work without bound. Closing or cancelling the iterator cancels
+    the walks still in flight.
+
+    Args:
+        form: The form definition, or a plan from compile_form.
+        answers_iterable: The answers dict of each submission, as a regular
+            or an async iterable.
+        answersWRTMetadata: Metadata answers shared by all submissions.
+        executor: Thread or process pool to walk in; None uses a thread pool
+            shared by the walks of this module. A process pool receives the
+            compiled plan pickled with every submission; walk_forms sends it
+            to each worker once, prefer it for CPU-bound batches.
+        concurrency: Maximum number of submissions walked at a time.
+        timeout: Seconds allowed per submission; a submission that takes
+            longer raises asyncio.TimeoutError from the iterator.
+        ordered: Yield results in input order. When False, results are
+            yielded as they complete, as (index, outputs) pairs.
+        outputs: Views to compute, as in walk_form.
+
+    Yields:
+        The five walk_form outputs per submission, or (index, outputs) pairs
+        when ordered is False.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    plan = form if isinstance(form, FormPlan) else compile_form(form)
+    requested = requested_outputs(outputs)
+
+    def submit(answers: dict) -> "asyncio.Task[_Outputs]":
+        return asyncio.ensure_future(
+            _run(
+                executor,
+                timeout,
+                walk_compiled,
+                plan,
+                answers,
+                answersWRTMetadata,
+                requested,
+            )
+        )
+
+    pending: Deque["asyncio.Task[_Outputs]"] = deque()
+    running: Set["asyncio.Task[_Outputs]"] = set()
+    indices: Dict["asyncio.Task[_Outputs]", int] = {}
+    try:
+        if ordered:
+            async for _, answers in _aenumerate(answers_iterable):
+                if len(pending) >= concurrency:
+                    yield await pending.popleft()
+                pending.append(submit(answers))
+            while pending:
+                yield await pending.popleft()
+        else:
+            async for index, answers in _aenumerate(answers_iterable):
+                while len(running) >= concurrency:
+                    done, running = await asyncio.wait(
+                        running, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        yield indices.pop(task), task.result()
+                task = submit(answers)
+                indices[task] = index
+                running.add(task)
+            while running:
+                done, running = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield indices.pop(task), task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        for task in running:
+            task.cancel()
@@ -1,13 +1,195 @@
+from bisect import bisect_left, insort
 from collections import Counter
-from typing import Any, List, Dict
+from collections.abc import Mapping
+from typing import (
+    Any,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Dict,
+    Optional,
+    Tuple,
+    Union,
+)
 from .constant import form_context_split_str
+from .stats import current_stats
+
+# sorts after every character that can appear in a context key
+_MAX_CHAR = "\U0010ffff"
+
+# marks the trie nodes of subform fields in subform_entry_index
+_ENTRIES = object()
 
 # This will be passed in from main.py
 # answers: Dict[str, List[Any]] = {}
 
 
+class AnswerStore(Mapping):
+    """
+    Answers mapping with a sorted key index.
+
+    Behaves like the plain answers dict (exact lookups stay dict lookups) and
+    additionally answers subtree and child segment queries by bisecting the
+    sorted keys instead of scanning every answer. Build it once per walk; it is
+    only changed through sync.
+    """
+
+    __slots__ = ("_answers", "_keys", "_entry_indexes")
+
+    def __init__(self, answers: Optional[Dict[str, List[Any]]] = None) -> None:
+        self._answers: Dict[str, List[Any]] = dict(answers or {})
+        self._keys: List[str] = sorted(self._answers)
+        # subform paths → subform_entry_index of the answers
+        self._entry_indexes: Dict[
+            FrozenSet[Tuple[str, ...]], Dict[str, List[str]]
+        ] = {}
+
+    def __getitem__(self, key: str) -> List[Any]:
+        return self._answers[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._answers
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._answers)
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._answers.get(key, default)
+
+    def sync(self, keys: Iterable[str], answers: Dict[str, List[Any]]) -> None:
+        """
+        Re-reads the given keys from answers, adding, replacing or dropping
+        them while keeping the key index sorted.
+        """
+        self._entry_indexes.clear()
+        for key in keys:
+            if key in answers:
+                if key not in self._answers:
+                    insort(self._keys, key)
+                self._answers[key] = answers[key]
+            elif key in self._answers:
+                del self._answers[key]
+                del self._keys[bisect_left(self._keys, key)]
+
+    def _range(self, prefix: str) -> range:
+        keys = self._keys
+        lo = bisect_left(keys, prefix)
+        return range(lo, bisect_left(keys, prefix + _MAX_CHAR, lo))
+
+    def subtree(self, context: str) -> Dict[str, List[Any]]:
+        """
+        Returns the answers at context and below it, in key order.
+        """
+        result: Dict[str, List[Any]] = {}
+        if context in self._answers:
+            result[context] = self._answers[context]
+        keys = self._keys
+        for i in self._range(context + form_context_split_str):
+            result[keys[i]] = self._answers[keys[i]]
+        return result
+
+    def has_subtree(self, context: str) -> bool:
+        """
+        Returns True if any answer exists below context.
+        """
+        return len(self._range(context + form_context_split_str)) > 0
+
+    def children(self, context: str) -> List[str]:
+        """
+        Returns the distinct segments directly below context, in key order.
+
+        Costs one bisect per child instead of a pass over the whole subtree.
+        """
+        keys = self._keys
+        prefix = context + form_context_split_str
+        prefix_len = len(prefix)
+        span = self._range(prefix)
+        end = span.stop
+
+        result: List[str] = []
+        seen = set()
+        i = span.start
+        while i < end:
+            key = keys[i]
+            child, has_rest, _ = key[prefix_len:].partition(form_context_split_str)
+            if child not in seen:
+                seen.add(child)
+                result.append(child)
+            if has_rest:
+                # everything below this child is contiguous in key order
+                i = bisect_left(keys, prefix + child + has_rest + _MAX_CHAR, i, end)
+            else:
+                i += 1
+        return result
+
+    def entries(
+        self, subform_paths: FrozenSet[Tuple[str, ...]], context: str
+    ) -> List[str]:
+        """
+        Returns the entry ids of the subform table at context, in the order
+        their first answers appear.
+
+        subform_paths are the form's subform field paths (form id first, "*"
+        for subform entries); the entries of all of them are indexed in one
+        pass over the answers, on first use. Tables the paths do not reach,
+        such as those inside the per-file copies of fileselect triggers, fall
+        back to children.
+        """
+        index = self._entry_indexes.get(subform_paths)
+        if index is None:
+            index = subform_entry_index(self._answers, subform_paths)
+            self._entry_indexes[subform_paths] = index
+        found = index.get(context)
+        return found if found is not None else self.children(context)
+
+
+def subform_entry_index(
+    keys: Iterable[str], subform_paths: Iterable[Tuple[str, ...]]
+) -> Dict[str, List[str]]:
+    """
+    Maps the context of every subform table answered in keys to its entry
+    ids, in order of first appearance. Top-level tables with no answers get an
+    empty list; keys are split once each.
+    """
+    # path segments → child trie; subform fields are marked with _ENTRIES
+    trie: Dict[Any, Any] = {}
+    index: Dict[str, Dict[str, None]] = {}
+    for path in subform_paths:
+        node = trie
+        for segment in path:
+            node = node.setdefault(segment, {})
+        node[_ENTRIES] = True
+        if "*" not in path:
+            index[form_context_split_str.join(path)] = {}
+
+    for key in keys:
+        parts = key.split(form_context_split_str)
+        level = trie
+        i = 0
+        while i < len(parts):
+            child: Optional[Dict[Any, Any]] = level.get(parts[i])
+            if child is None:
+                break
+            level = child
+            i += 1
+            if _ENTRIES in level and i < len(parts):
+                # parts[i] is an entry of the table at parts[:i]
+                context = form_context_split_str.join(parts[:i])
+                index.setdefault(context, {})[parts[i]] = None
+                child = level.get("*")
+                if child is None:
+                    break
+                level = child
+                i += 1
+    return {context: list(entries) for context, entries in index.items()}
+
+
 def get_subform_answers(
-    context: str, answers: Dict[str, List[Any]]
+    context: str, answers: Union[Dict[str, List[Any]], AnswerStore]
 ) -> Dict[str, List[Any]]:
     """
     Extracts answers belonging to a specific subform context.
@@ -20,6 +202,23 @@ def get_subform_answers(
         A dictionary of subform answers keyed by their full context path.
         Only keys that match the context exactly or start with "context + separator" are included.
     """
+    stats = current_stats.get()
+    if stats is None:
+        return _get_subform_answers(context, answers)
+
+    started = stats.begin("get_subform_answers")
+    try:
+        return _get_subform_answers(context, answers)
+    finally:
+        stats.end("get_subform_answers", started)
+
+
+def _get_subform_answers(
+    context: str, answers: Union[Dict[str, List[Any]], AnswerStore]
+) -> Dict[str, List[Any]]:
+    if isinstance(answers, AnswerStore):
+        return answers.subtree(context)
+
     result: Dict[str, List[Any]] = {}
     context_prefix = (
         context + form_context_split_str
@@ -32,7 +231,7 @@ def get_subform_answers(
     return result
 
 
-def get_form_answer(context: str, answers: Dict[str, List[Any]]) -> List[Any]:
+def get_form_answer(context: str, answers: Mapping[str, List[Any]]) -> List[Any]:
     """
     Retrieves the answer array for a given context.
     Returns an empty list if none exist.
@@ -40,9 +239,84 @@ def get_form_answer(context: str, answers: Dict[str, List[Any]]) -> List[Any]:
     return answers.get(context, [])
 
 
+def is_answered(values: List[Any]) -> bool:
+    """
+    True if an answer array holds at least one value that is not blank: None
+    and strings of only whitespace are blank.
+    """
+    return any(
+        value is not None and not (isinstance(value, str) and not value.strip())
+        for value in values
+    )
+
+
 def are_form_answers_equal(a: List[Any], b: List[Any]) -> bool:
     """
     Compares two answer lists for equality,
     ignoring order but considering duplicates.
     """
-    return Counter(a) == Counter(b)
+    return answer_multiset(a) == answer_multiset(b)
+
+
+# An answer list as a multiset: frozenset of (hashable value, count) pairs.
+# Two lists are equal under are_form_answers_equal iff their multisets are.
+AnswerMultiset = FrozenSet[Tuple[Any, int]]
+
+
+def hashable_answer(value: Any) -> Any:
+    """
+    Returns a hashable stand-in for an answer value that compares equal to
+    another value's stand-in iff the values are equal. Dicts (file objects)
+    and lists are converted recursively, everything else is returned as is.
+    """
+    if isinstance(value, dict):
+        return (
+            "__dict__",
+            frozenset((k, hashable_answer(v)) for k, v in value.items()),
+        )
+    if isinstance(value, list):
+        return ("__list__", tuple(hashable_answer(v) for v in value))
+    return value
+
+
+def answer_multiset(values: Iterable[Any]) -> AnswerMultiset:
+    """
+    Returns the multiset of an answer list, see AnswerMultiset.
+    """
+    if isinstance(values, Mapping):
+        # Counter takes a mapping as counts
+        counts = Counter(values)
+    else:
+        counts = Counter(hashable_answer(v) for v in values)
+    return frozenset((value, n) for value, n in counts.items() if n)
+
+
+def answer_multisets(
+    candidates: Iterable[Any],
+) -> Optional[FrozenSet[AnswerMultiset]]:
+    """
+    Precompiles the expected answers of a visibility dependency.
+    Returns None if a candidate is not an answer list, callers then compare
+    candidate by candidate with are_form_answers_equal.
+    """
+    try:
+        return frozenset(answer_multiset(candidate) for candidate in candidates)
+    except TypeError:
+        return None
+
+
+def matches_any_answer(
+    expected: Optional[FrozenSet[AnswerMultiset]],
+    candidates: Iterable[Any],
+    answers: List[Any],
+) -> bool:
+    """
+    Returns True if answers equal one of the candidates, as are_form_answers_equal
+    decides; a single hash lookup when expected was precompiled.
+    """
+    if expected is not None:
+        return answer_multiset(answers) in expected
+    for candidate in candidates:
+        if are_form_answers_equal(candidate, answers):
+            return True
+    return False
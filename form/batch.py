@@ -0,0 +1,137 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from .compiled import walk_compiled
+from .form import requested_outputs
+from .plan import FormPlan, compile_form
+
+_Outputs = Tuple[
+    Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any]
+]
+
+# Set once per worker process by _init_worker
+_worker_plan: Optional[FormPlan] = None
+_worker_answersWRTMetadata: Optional[dict] = None
+_worker_outputs: Optional[FrozenSet[str]] = None
+
+
+def _init_worker(
+    plan: FormPlan,
+    answersWRTMetadata: Optional[dict],
+    outputs: Optional[FrozenSet[str]],
+) -> None:
+    global _worker_plan, _worker_answersWRTMetadata, _worker_outputs
+    _worker_plan = plan
+    _worker_answersWRTMetadata = answersWRTMetadata
+    _worker_outputs = outputs
+
+
+def _walk_chunk(start: int, chunk: List[dict]) -> Tuple[int, List[_Outputs]]:
+    assert _worker_plan is not None
+    return start, [
+        walk_compiled(
+            _worker_plan, answers, _worker_answersWRTMetadata, _worker_outputs
+        )
+        for answers in chunk
+    ]
+
+
+def _chunks(
+    answers_iterable: Iterable[dict], chunksize: int
+) -> Iterator[Tuple[int, List[dict]]]:
+    iterator = iter(answers_iterable)
+    start = 0
+    while True:
+        chunk = list(islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def walk_forms(
+    form: Union[dict, FormPlan],
+    answers_iterable: Iterable[dict],
+    answersWRTMetadata: Optional[dict] = None,
+    workers: Optional[int] = None,
+    chunksize: int = 64,
+    ordered: bool = True,
+    outputs: Optional[Iterable[str]] = None,
+) -> Iterator[Any]:
+    """
+    Walks many submissions of one form, optionally across worker processes.
+
+    The form is compiled once and each worker receives the plan once, when it
+    starts. Submissions are read lazily and sent in chunks, with at most two
+    chunks per worker in flight, so memory stays bounded for any input size.
+    The compiled walker keeps no module-level state, so nothing carries over
+    between submissions or workers.
+
+    Args:
+        form: The form definition, or a plan from compile_form.
+        answers_iterable: The answers dict of each submission.
+        answersWRTMetadata: Metadata answers shared by all submissions.
+        workers: Number of worker processes; None or 1 walks in this process.
+        chunksize: Number of submissions sent to a worker at a time.
+        ordered: Yield results in input order. When False, results are
+            yielded as chunks complete, as (index, outputs) pairs.
+        outputs: Views to compute, as in walk_form.
+
+    Yields:
+        The five walk_form outputs per submission, or (index, outputs) pairs
+        when ordered is False.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+    plan = form if isinstance(form, FormPlan) else compile_form(form)
+    requested = requested_outputs(outputs)
+
+    if workers is None or workers <= 1:
+        for index, answers in enumerate(answers_iterable):
+            views = walk_compiled(plan, answers, answersWRTMetadata, requested)
+            yield views if ordered else (index, views)
+        return
+
+    max_in_flight = workers * 2
+    chunks = _chunks(answers_iterable, chunksize)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(plan, answersWRTMetadata, requested),
+    ) as executor:
+        if ordered:
+            pending: Deque[Future] = deque()
+            for start, chunk in islice(chunks, max_in_flight):
+                pending.append(executor.submit(_walk_chunk, start, chunk))
+            while pending:
+                _, results = pending.popleft().result()
+                for start, chunk in islice(chunks, 1):
+                    pending.append(executor.submit(_walk_chunk, start, chunk))
+                yield from results
+        else:
+            running: Set[Future] = {
+                executor.submit(_walk_chunk, start, chunk)
+                for start, chunk in islice(chunks, max_in_flight)
+            }
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, results = future.result()
+                    for start_chunk, chunk in islice(chunks, 1):
+                        running.add(executor.submit(_walk_chunk, start_chunk, chunk))
+                    for offset, views in enumerate(results):
+                        yield start + offset, views
@@ -0,0 +1,149 @@
+import json
+import mmap
+import os
+from typing import Any, BinaryIO, Callable, Dict, Optional, Union
+
+# Pluggable JSON codec: orjson or msgspec when installed, the stdlib otherwise.
+# Every backend reads bytes (or any buffer) and writes UTF-8 bytes, so input
+# files are parsed straight from a memory map without a text decode, and
+# output goes to binary streams without an encode.
+#
+# The fast backends differ from the stdlib only in edge cases: they write
+# non-ASCII characters unescaped, and orjson reads integers beyond 64 bits
+# as floats. Pick the "json" backend where that matters.
+
+Buffer = Union[bytes, bytearray, memoryview, str]
+
+
+class JsonCodec:
+    """
+    One JSON backend: loads parses a buffer, dumps encodes to bytes, either
+    compact or indented by two spaces.
+    """
+
+    __slots__ = ("name", "loads", "_dumps")
+
+    def __init__(
+        self,
+        name: str,
+        loads: Callable[[Buffer], Any],
+        dumps: Callable[[Any, bool], bytes],
+    ) -> None:
+        self.name = name
+        self.loads = loads
+        self._dumps = dumps
+
+    def dumps(self, obj: Any, indent: bool = False) -> bytes:
+        try:
+            return self._dumps(obj, indent)
+        except TypeError:
+            if self.name == "json":
+                raise
+            # values the fast backends cannot encode, such as huge integers
+            return _stdlib_dumps(obj, indent)
+
+    def __repr__(self) -> str:
+        return f"JsonCodec({self.name!r})"
+
+
+def _stdlib_loads(data: Buffer) -> Any:
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def _stdlib_dumps(obj: Any, indent: bool) -> bytes:
+    if indent:
+        return json.dumps(obj, indent=2).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+codecs: Dict[str, JsonCodec] = {
+    "json": JsonCodec("json", _stdlib_loads, _stdlib_dumps),
+}
+
+try:
+    import orjson
+
+    def _orjson_dumps(obj: Any, indent: bool) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+    codecs["orjson"] = JsonCodec("orjson", orjson.loads, _orjson_dumps)
+except ImportError:
+    pass
+
+try:
+    import msgspec
+
+    _msgspec_decoder = msgspec.json.Decoder()
+    _msgspec_encoder = msgspec.json.Encoder()
+
+    def _msgspec_dumps(obj: Any, indent: bool) -> bytes:
+        encoded = _msgspec_encoder.encode(obj)
+        return msgspec.json.format(encoded, indent=2) if indent else encoded
+
+    codecs["msgspec"] = JsonCodec("msgspec", _msgspec_decoder.decode, _msgspec_dumps)
+except ImportError:
+    pass
+
+# fastest installed backend first
+default_codec: JsonCodec = next(
+    codecs[name] for name in ("orjson", "msgspec", "json") if name in codecs
+)
+
+
+def get_codec(name: Optional[str] = None) -> JsonCodec:
+    """
+    Returns the named backend, or the default one when name is None.
+    """
+    if name is None:
+        return default_codec
+    if name not in codecs:
+        raise ValueError(
+            f"JSON backend {name!r} is not available, expected one of {sorted(codecs)}"
+        )
+    return codecs[name]
+
+
+def load_path(
+    path: Union[str, "os.PathLike[str]"], codec: Optional[JsonCodec] = None
+) -> Any:
+    """
+    Parses a JSON file, reading it through a memory map instead of decoding
+    it to text first.
+    """
+    codec = codec or default_codec
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # empty files and streams cannot be mapped
+            return codec.loads(f.read())
+        with mapped, memoryview(mapped) as view:
+            return codec.loads(view)
+
+
+def dump_stream(
+    obj: Any, fp: BinaryIO, codec: Optional[JsonCodec] = None, indent: bool = False
+) -> None:
+    """
+    Writes obj to a binary stream. A top-level dict is written one entry at a
+    time, one entry per line, so its whole encoding is never held in memory;
+    indent then applies within the entries.
+    """
+    codec = codec or default_codec
+    if not isinstance(obj, dict) or not obj:
+        fp.write(codec.dumps(obj, indent))
+        return
+
+    separator = b"{\n"
+    for key, value in obj.items():
+        fp.write(separator)
+        fp.write(codec.dumps(str(key)))
+        fp.write(b": " if indent else b":")
+        fp.write(codec.dumps(value, indent))
+        separator = b",\n"
+    fp.write(b"\n}")
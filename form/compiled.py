@@ -0,0 +1,567 @@
+from concurrent.futures import Executor
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .answer import AnswerStore, matches_any_answer
+from .constant import (
+    all_form_outputs,
+    form_context_split_str,
+    form_hidden_outputs,
+    form_output_names,
+)
+from .engine import (
+    Step,
+    Task,
+    add_field_answers,
+    constructed_answer,
+    enter_node,
+    subform_tasks,
+    triggered_sections,
+)
+from .form import requested_outputs
+from .metadata import metadata_index
+from .plan import DependencyRef, FormPlan, OptionIndex, PlanNode
+
+
+def resolve_ref(plan: FormPlan, ref: DependencyRef, context: str) -> str:
+    """
+    Compiled counterpart of resolve_context_path, returning only the "wIdx" key.
+    """
+    if not ref.wildcards:
+        return ref.key
+    context_parts = context.split(form_context_split_str)
+    resolved_path = [
+        (context_parts[i + 1] if p == "*" and (i + 1) < len(context_parts) else p)
+        for i, p in enumerate(ref.path)
+    ]
+    return plan.form_id + form_context_split_str + form_context_split_str.join(
+        resolved_path
+    )
+
+
+def dep_cache_key(plan: FormPlan, node: PlanNode, context: str) -> Tuple:
+    """
+    Identifies the dependency result of a node in a given context.
+
+    Only dependencies with "*" wildcards depend on the context, so nodes without
+    them are keyed by their index alone.
+    """
+    key: List[Any] = [node.index]
+    for dep in node.dependencies:
+        if dep.target.wildcards:
+            key.append(resolve_ref(plan, dep.target, context))
+        for exclude in dep.exclude:
+            if exclude.wildcards:
+                key.append(resolve_ref(plan, exclude, context))
+    return tuple(key)
+
+
+def compiled_dep_data(
+    plan: FormPlan,
+    node: PlanNode,
+    context: str,
+    form_answers: Mapping[str, List[Any]],
+    cache: Optional[Dict[Tuple, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Resolves dependency data for a plan node, like form_dep_data does for raw nodes.
+    cache is an optional walk-scoped memo, see form_dep_data.
+    """
+    if not node.dependencies:
+        return {"canRender": True, "options": [], "files": []}
+
+    if not form_answers:
+        return {"canRender": False, "options": [], "files": []}
+
+    cache_key: Tuple = ()
+    if cache is not None:
+        cache_key = dep_cache_key(plan, node, context)
+        if cache_key in cache:
+            return cache[cache_key]
+
+    can_render = True
+    aggregated_options: List[dict] = []
+    aggregated_files: List[dict] = []
+
+    for dep in node.dependencies:
+        # whole parent tree visibility
+        for parent in dep.parents:
+            if parent.node >= 0:
+                parent_dep_data = compiled_dep_data(
+                    plan,
+                    plan.nodes[parent.node],
+                    resolve_ref(plan, parent, context),
+                    form_answers,
+                    cache,
+                )
+                can_render = can_render and parent_dep_data["canRender"]
+        dep_answers = form_answers.get(resolve_ref(plan, dep.target, context), [])
+
+        if dep.type == "visibility":
+            this_visible = False
+            if not dep.answers and dep_answers:
+                this_visible = True
+            elif dep.answers:
+                this_visible = matches_any_answer(
+                    dep.answer_sets, dep.answers, dep_answers
+                )
+            can_render = can_render and this_visible
+
+        elif dep.type == "options":
+            chosen_options: List[dict] = []
+            if dep_answers and dep.target_options is not None:
+                index = dep.target_option_index
+                if index is not None and index.complete:
+                    chosen_options = [
+                        dep.target_options[i]
+                        for i in index.matching(dep_answers, unique=True)
+                    ]
+                else:
+                    chosen_options = [
+                        opt
+                        for opt in dep.target_options
+                        if opt["value"] in dep_answers
+                    ]
+            aggregated_options.extend(chosen_options)
+            can_render = can_render and len(chosen_options) > 0
+
+        elif dep.type == "files":
+            final_files: List[dict] = []
+            if dep_answers and all(
+                not isinstance(a, (str, int, bool)) for a in dep_answers
+            ):
+                final_files = dep_answers  # type: ignore
+
+                # handle exclusions
+                for exclude in dep.exclude:
+                    exclude_answers = form_answers.get(
+                        resolve_ref(plan, exclude, context), []
+                    )
+                    final_files = [
+                        f for f in final_files if f["id"] not in exclude_answers
+                    ]
+
+            aggregated_files.extend(final_files)
+            can_render = can_render and len(final_files) > 0
+
+    result = {
+        "canRender": can_render,
+        "options": aggregated_options,
+        "files": aggregated_files,
+    }
+    if cache is not None:
+        cache[cache_key] = result
+    return result
+
+
+# Like the engine, a walk is a stack of (step, args) tasks: a step handles one
+# plan node and pushes the steps for its children, reversed, so they are popped
+# in the depth-first order of the form whatever the nesting depth.
+class _CompiledWalk:
+    """
+    Walks a FormPlan for one set of answers.
+
+    The steps below read plan nodes and hand them to the step bodies they share
+    with the engine (form/engine.py), supplying the plan lookups those need;
+    the accumulators that every level shares (flat and constructed answers)
+    live on the instance, the ones that get nested per level are passed along.
+    """
+
+    __slots__ = (
+        "plan",
+        "nodes",
+        "answers",
+        "answersWRTMetadata",
+        "metadata_index",
+        "flat_answers",
+        "constructed_answers",
+        "dep_cache",
+        "walk_hidden",
+        "construct",
+        "metadata_only",
+    )
+
+    # compiled walks walk every subform table in line
+    subform_executor: Optional[Executor] = None
+
+    def __init__(
+        self,
+        plan: FormPlan,
+        answers: AnswerStore,
+        answersWRTMetadata: Optional[dict],
+        dep_cache: Optional[Dict[Tuple, Dict[str, Any]]] = None,
+        outputs: FrozenSet[str] = all_form_outputs,
+    ) -> None:
+        self.plan = plan
+        self.nodes = plan.nodes
+        self.answers = answers
+        self.answersWRTMetadata = answersWRTMetadata
+        self.metadata_index = (
+            metadata_index(answersWRTMetadata) if answersWRTMetadata else None
+        )
+        self.flat_answers: Dict[str, Any] = {}
+        self.constructed_answers: Dict[str, Any] = {}
+        self.dep_cache: Dict[Tuple, Dict[str, Any]] = (
+            {} if dep_cache is None else dep_cache
+        )
+        # parts that cannot render only feed possible and constructed answers
+        self.walk_hidden = bool(outputs & form_hidden_outputs)
+        self.construct = "constructed" in outputs
+        # metadata and constructed answers only come from nodes with metadata ids
+        self.metadata_only = outputs <= {"metadata", "constructed"}
+
+    def run(self, step: Step, args: Tuple[Any, ...]) -> None:
+        """
+        Walks from one node until its whole subtree is done.
+        """
+        stack: List[Task] = [(step, args)]
+        pop = stack.pop
+        while stack:
+            step, args = pop()
+            step(self, stack, *args)
+
+    def skip(self, node: PlanNode, canRender: bool) -> bool:
+        """
+        True if walking node cannot change any requested output.
+        """
+        if not canRender and not self.walk_hidden:
+            return True
+        return self.metadata_only and not node.metadata_below
+
+    def dep_data(self, node: PlanNode, context: str) -> Dict[str, Any]:
+        return compiled_dep_data(
+            self.plan, node, context, self.answers, self.dep_cache
+        )
+
+    def can_render(self, node: PlanNode, context: str) -> bool:
+        if not node.dependencies:
+            return True
+        return self.dep_data(node, context)["canRender"]
+
+    # lookups of the shared step bodies, see engine.py
+
+    def child(self, context: str, segment: Any) -> str:
+        return f"{context}{form_context_split_str}{segment}"
+
+    def option_index(self, field: PlanNode) -> OptionIndex:
+        assert field.option_index is not None
+        return field.option_index
+
+    def option_triggers(self, field: PlanNode, position: int) -> List[PlanNode]:
+        nodes = self.nodes
+        return [nodes[index] for index in field.options[position][1]]
+
+    def field_triggers(self, field: PlanNode) -> List[PlanNode]:
+        nodes = self.nodes
+        return [nodes[index] for index in field.triggers]
+
+    def trigger_type(self, trigger: PlanNode) -> Optional[str]:
+        return trigger.type
+
+    def trigger_id(self, trigger: PlanNode) -> str:
+        return trigger.id
+
+    def subform_phases(self, field: PlanNode) -> Optional[List[PlanNode]]:
+        if field.children is None:
+            return None
+        nodes = self.nodes
+        return [nodes[index] for index in field.children]
+
+    def subform_entries(self, context: str) -> List[str]:
+        return self.answers.entries(self.plan.subform_paths, context)
+
+
+def _phase_step(
+    walk: _CompiledWalk,
+    stack: List[Task],
+    phase: PlanNode,
+    context: str,
+    metadata_context: Tuple[str, ...],
+    canRender: bool,
+    metadata_answers: Dict[str, Any],
+    nested_answers: Dict[str, Any],
+    possible_answers: Dict[str, Any],
+    sections: Optional[Tuple[int, ...]] = None,
+) -> None:
+    """
+    sections restricts the walk to some of the phase's sections.
+    """
+    if phase.children is None or walk.skip(phase, canRender):
+        return
+    derived_context = context + phase.suffix
+    (
+        metadata_context,
+        nested_metadata_answers,
+        nested_nested_answers,
+        nested_possible_answers,
+    ) = enter_node(
+        phase.id,
+        phase.metadata_id,
+        canRender,
+        metadata_context,
+        metadata_answers,
+        nested_answers,
+        possible_answers,
+    )
+
+    nodes = walk.nodes
+    for index in reversed(phase.children if sections is None else sections):
+        section = nodes[index]
+        if walk.metadata_only and not section.metadata_below:
+            continue
+        stack.append(
+            (
+                _section_step,
+                (
+                    section,
+                    derived_context,
+                    metadata_context,
+                    canRender and walk.can_render(section, derived_context),
+                    nested_metadata_answers,
+                    nested_nested_answers,
+                    nested_possible_answers,
+                ),
+            )
+        )
+
+
+def _section_step(
+    walk: _CompiledWalk,
+    stack: List[Task],
+    section: PlanNode,
+    context: str,
+    metadata_context: Tuple[str, ...],
+    canRender: bool,
+    metadata_answers: Dict[str, Any],
+    nested_answers: Dict[str, Any],
+    possible_answers: Dict[str, Any],
+    section_id: Optional[str] = None,
+) -> None:
+    if walk.skip(section, canRender):
+        return
+    # section_id differs from section.id for per-file fileselect triggers
+    if section_id is None:
+        section_id = section.id
+    derived_context = f"{context}{form_context_split_str}{section_id}"
+    (
+        metadata_context,
+        nested_metadata_answers,
+        nested_nested_answers,
+        nested_possible_answers,
+    ) = enter_node(
+        section_id,
+        section.metadata_id,
+        canRender,
+        metadata_context,
+        metadata_answers,
+        nested_answers,
+        possible_answers,
+    )
+
+    if section.children is None:
+        return
+
+    nodes = walk.nodes
+    for index in reversed(section.children):
+        field = nodes[index]
+        if walk.metadata_only and not field.metadata_below:
+            continue
+        stack.append(
+            (
+                _field_step,
+                (
+                    field,
+                    derived_context,
+                    metadata_context,
+                    canRender and walk.can_render(field, derived_context),
+                    nested_metadata_answers,
+                    nested_nested_answers,
+                    nested_possible_answers,
+                ),
+            )
+        )
+
+
+def _field_step(
+    walk: _CompiledWalk,
+    stack: List[Task],
+    field: PlanNode,
+    context: str,
+    metadata_context: Tuple[str, ...],
+    canRender: bool,
+    metadata_answers: Dict[str, Any],
+    nested_answers: Dict[str, Any],
+    possible_answers: Dict[str, Any],
+) -> None:
+    if walk.skip(field, canRender):
+        return
+    field_type = field.type
+    metadata_id = field.metadata_id
+    derived_context = context + field.suffix
+
+    renders = canRender and walk.dep_data(field, derived_context)["canRender"]
+    value = walk.answers.get(derived_context, [])
+
+    if walk.construct:
+        nest = constructed_answer(walk, metadata_context, metadata_id, field_type)
+        if nest is not None:
+            walk.constructed_answers[derived_context] = nest
+
+    add_field_answers(
+        field.id,
+        field_type,
+        metadata_id,
+        value,
+        canRender,
+        renders,
+        metadata_answers,
+        nested_answers,
+        possible_answers,
+        walk.flat_answers,
+    )
+
+    phases = walk.subform_phases(field) if field_type == "subformwtable" else None
+    if phases is not None:
+        children = subform_tasks(
+            walk,
+            _phase_step,
+            field,
+            phases,
+            derived_context,
+            metadata_context,
+            metadata_id,
+            canRender,
+            renders,
+            metadata_answers,
+            nested_answers,
+            possible_answers,
+        )
+        stack.extend(reversed(children))
+        return
+
+    triggered = triggered_sections(walk, field, field_type, value, renders)
+    for trig, section_id, trig_can_render in reversed(triggered):
+        stack.append(
+            (
+                _section_step,
+                (
+                    trig,
+                    context,
+                    metadata_context,
+                    trig_can_render,
+                    metadata_answers,
+                    nested_answers,
+                    possible_answers,
+                    section_id,
+                ),
+            )
+        )
+
+
+def walk_compiled(
+    plan: FormPlan,
+    answers: Union[dict, AnswerStore],
+    answersWRTMetadata: Optional[dict],
+    outputs: Optional[Iterable[str]] = None,
+) -> Tuple[
+    Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any]
+]:
+    """
+    Walk a compiled form and collect all answers organized by metadata.id.
+
+    Produces the same five outputs as walk_form for the form the plan was
+    compiled from, without re-reading the form definition.
+    answers may be a plain dict or a prebuilt AnswerStore, outputs selects
+    views as in walk_form.
+    """
+    outputs = requested_outputs(outputs)
+    if not isinstance(answers, AnswerStore):
+        answers = AnswerStore(answers)
+    walk = _CompiledWalk(plan, answers, answersWRTMetadata, outputs=outputs)
+
+    metadata_answers: Dict[str, Any] = {}
+    nested_answers: Dict[str, Any] = {}
+    possible_answers: Dict[str, Any] = {}
+
+    for index in plan.phases:
+        phase = plan.nodes[index]
+        walk.run(
+            _phase_step,
+            (
+                phase,
+                plan.form_id,
+                (),
+                walk.can_render(phase, plan.form_id),
+                metadata_answers,
+                nested_answers,
+                possible_answers,
+            ),
+        )
+
+    views = (
+        metadata_answers,
+        nested_answers,
+        walk.flat_answers,
+        possible_answers,
+        walk.constructed_answers,
+    )
+    return tuple(  # type: ignore[return-value]
+        view if name in outputs else {}
+        for name, view in zip(form_output_names, views)
+    )
+
+
+def walk_compiled_segment(
+    plan: FormPlan,
+    answers: AnswerStore,
+    answersWRTMetadata: Optional[dict],
+    phase_index: int,
+    sections: Tuple[int, ...],
+    dep_cache: Optional[Dict[Tuple, Dict[str, Any]]] = None,
+) -> Tuple[
+    Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any]
+]:
+    """
+    Walks some sections of one top-level phase into fresh output dicts.
+
+    The five outputs are what walk_compiled would have added for these
+    sections, so walking a form segment by segment and merging the results in
+    order gives the walk_compiled outputs.
+    """
+    walk = _CompiledWalk(plan, answers, answersWRTMetadata, dep_cache)
+
+    metadata_answers: Dict[str, Any] = {}
+    nested_answers: Dict[str, Any] = {}
+    possible_answers: Dict[str, Any] = {}
+
+    phase = plan.nodes[phase_index]
+    walk.run(
+        _phase_step,
+        (
+            phase,
+            plan.form_id,
+            (),
+            walk.can_render(phase, plan.form_id),
+            metadata_answers,
+            nested_answers,
+            possible_answers,
+            sections,
+        ),
+    )
+
+    return (
+        metadata_answers,
+        nested_answers,
+        walk.flat_answers,
+        possible_answers,
+        walk.constructed_answers,
+    )
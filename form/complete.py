@@ -0,0 +1,96 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .answer import AnswerStore, get_form_answer, is_answered
+from .constant import form_context_split_str
+from .dependency import form_dep_data
+
+
+def _section_fields(
+    sections: List[dict], parent_context: str
+) -> Iterator[Tuple[dict, str]]:
+    # fields of sections hanging off parent_context, with their section context
+    for section in sections:
+        context = f"{parent_context}{form_context_split_str}{section['id']}"
+        for field in section.get("fields", []):
+            yield field, context
+
+
+def iter_visible_required_fields(
+    form: dict, answers: Union[Dict[str, List[Any]], AnswerStore]
+) -> Iterator[str]:
+    """
+    Yields the contexts of the visible required fields of a form, lazily and
+    in the order collect_visible_required_fields_from_phases lists them.
+    Dependencies are only evaluated as far as the caller consumes.
+    """
+    dep_cache: Dict[tuple, Dict[str, Any]] = {}
+
+    def visible(node: dict, context: str) -> bool:
+        return form_dep_data(form, node, context, answers, dep_cache)["canRender"]
+
+    form_id = form.get("id", "<no-id>")
+    for phase in form.get("phases", []):
+        phase_context = f"{form_id}{form_context_split_str}{phase['id']}"
+        if not visible(phase, phase_context):
+            continue
+
+        for section in phase.get("sections", []):
+            section_context = f"{phase_context}{form_context_split_str}{section['id']}"
+            if not visible(section, section_context):
+                continue
+
+            # (field, section context) iterators; a visible field's trigger
+            # sections are walked before the fields that follow it
+            stack: List[Iterator[Tuple[dict, str]]] = [
+                _section_fields([section], phase_context)
+            ]
+            while stack:
+                entry = next(stack[-1], None)
+                if entry is None:
+                    stack.pop()
+                    continue
+
+                field, context = entry
+                field_context = f"{context}{form_context_split_str}{field['id']}"
+                if not visible(field, field_context):
+                    continue
+                if field.get("required"):
+                    yield field_context
+
+                triggers = [
+                    trig
+                    for trig in field.get("triggers", [])
+                    if trig.get("type") == "section"
+                ]
+                if triggers:
+                    stack.append(_section_fields(triggers, field_context))
+
+
+def missing_required(
+    form: dict,
+    answers: Union[Dict[str, List[Any]], AnswerStore],
+    limit: Optional[int] = None,
+) -> List[str]:
+    """
+    Returns the contexts of visible required fields without an answer, in form
+    order, stopping after limit of them. Answers holding only blank values
+    (None or whitespace strings, see is_answered) count as missing. Builds no
+    walk outputs.
+    """
+    missing: List[str] = []
+    if limit is not None and limit <= 0:
+        return missing
+    for context in iter_visible_required_fields(form, answers):
+        if not is_answered(get_form_answer(context, answers)):
+            missing.append(context)
+            if len(missing) == limit:
+                break
+    return missing
+
+
+def is_complete(form: dict, answers: Union[Dict[str, List[Any]], AnswerStore]) -> bool:
+    """
+    Returns True if every visible required field is answered; stops at the
+    first one that is not.
+    """
+    return not missing_required(form, answers, limit=1)
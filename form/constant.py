@@ -1,2 +1,8 @@
 # Global context split string
 form_context_split_str = "______"
+
+# Views produced by a walk, in the order walk_form returns them
+form_output_names = ("metadata", "nested", "flat", "possible", "constructed")
+all_form_outputs = frozenset(form_output_names)
+# Views that walks of parts which cannot render still write to
+form_hidden_outputs = frozenset({"possible", "constructed"})
@@ -0,0 +1,254 @@
+from concurrent.futures import Executor
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+
+from .answer import AnswerStore
+from .constant import (
+    all_form_outputs,
+    form_context_split_str,
+    form_hidden_outputs,
+    form_output_names,
+)
+from .defs import RequiredFieldCache, form_part_memo, subform_paths
+from .metadata import metadata_index
+from .plan import OptionIndex, build_option_index
+from .stats import WalkStats
+
+
+class ContextPaths:
+    """
+    Interns contexts as integer ids.
+
+    A context is the sequence of ids from the form down to a node; the walkers
+    used to build it as a form_context_split_str-joined string at every level
+    and split it back apart wherever its parts were needed. Here a child
+    context is one dict lookup in its parent's children, and the string key
+    and the parts tuple are only built, once, for contexts that need them.
+
+    Ids follow the string semantics exactly: two contexts get the same id iff
+    their joined strings are equal. Id 0 is the empty context above the form.
+    """
+
+    __slots__ = ("_children", "_parent", "_segment", "_keys", "_parts")
+
+    def __init__(self) -> None:
+        self._children: List[Dict[str, int]] = [{}]
+        self._parent: List[int] = [-1]
+        self._segment: List[str] = [""]
+        self._keys: List[Optional[str]] = [""]
+        self._parts: List[Optional[Tuple[str, ...]]] = [()]
+
+    def _add(self, parent: int, segment: str) -> int:
+        cid = len(self._parent)
+        self._children[parent][segment] = cid
+        self._children.append({})
+        self._parent.append(parent)
+        self._segment.append(segment)
+        self._keys.append(None)
+        self._parts.append(None)
+        return cid
+
+    def intern(self, context: str) -> int:
+        """
+        Returns the id of a context string.
+        """
+        children = self._children
+        cid = 0
+        for segment in context.split(form_context_split_str):
+            child = children[cid].get(segment)
+            cid = self._add(cid, segment) if child is None else child
+        return cid
+
+    def child(self, parent: int, segment: Any) -> int:
+        """
+        Returns the id of the context one segment below parent.
+        """
+        cid = self._children[parent].get(segment)
+        if cid is not None:
+            return cid
+        if not isinstance(segment, str):
+            segment = str(segment)
+        if (
+            segment[:1] == "_"
+            or self._segment[parent][-1:] == "_"
+            or form_context_split_str in segment
+        ):
+            # the joined string splits differently than the segments it was
+            # built from, intern what it splits into
+            return self.intern(self.key(parent) + form_context_split_str + segment)
+        return self._add(parent, segment)
+
+    def key(self, cid: int) -> str:
+        """
+        Returns the context string of an id.
+        """
+        key = self._keys[cid]
+        if key is not None:
+            return key
+        # collect the ancestors still missing their key, without recursing
+        chain = []
+        while self._keys[cid] is None:
+            chain.append(cid)
+            cid = self._parent[cid]
+        key = self._keys[cid]
+        for cid in reversed(chain):
+            segment = self._segment[cid]
+            if self._parent[cid]:
+                key = f"{key}{form_context_split_str}{segment}"
+            else:
+                key = segment
+            self._keys[cid] = key
+        return key  # type: ignore[return-value]
+
+    def parts(self, cid: int) -> Tuple[str, ...]:
+        """
+        Returns the segments of an id, as splitting its string would.
+        """
+        parts = self._parts[cid]
+        if parts is not None:
+            return parts
+        chain = []
+        while self._parts[cid] is None:
+            chain.append(cid)
+            cid = self._parent[cid]
+        parts = self._parts[cid]
+        for cid in reversed(chain):
+            parts = parts + (self._segment[cid],)  # type: ignore[operator]
+            self._parts[cid] = parts
+        return parts  # type: ignore[return-value]
+
+
+class WalkContext:
+    """
+    State of one walk of a form.
+
+    Holds the form, the answer store, the output accumulators and every
+    per-walk cache, so walks share no mutable module state and any number of
+    them can run side by side in threads. walk_phase, walk_section and
+    walk_field take it in place of the values they used to pass along.
+    """
+
+    __slots__ = (
+        "form",
+        "answers",
+        "paths",
+        "answer_ids",
+        "answersWRTMetadata",
+        "metadata_index",
+        "outputs",
+        "walk_hidden",
+        "metadata_answers",
+        "nested_answers",
+        "flat_answers",
+        "possible_answers",
+        "constructed_answers",
+        "dep_cache",
+        "required_field_cache",
+        "stats",
+        "subform_executor",
+        "subform_threshold",
+        "subform_chunksize",
+    )
+
+    def __init__(
+        self,
+        form: dict,
+        answers: Union[Dict[str, List[Any]], AnswerStore],
+        answersWRTMetadata: Optional[dict],
+        outputs: FrozenSet[str] = all_form_outputs,
+        stats: Optional[WalkStats] = None,
+        scope: Optional[List[str]] = None,
+    ) -> None:
+        self.form = form
+        self.answers = (
+            answers if isinstance(answers, AnswerStore) else AnswerStore(answers)
+        )
+        # answers by context id, so walkers look them up without building keys;
+        # a walk of parts of the form (scope) only needs the answers below them
+        self.paths = ContextPaths()
+        scoped = [self.answers] if scope is None else map(self.answers.subtree, scope)
+        self.answer_ids: Dict[int, List[Any]] = {
+            self.paths.intern(key): value
+            for answers in scoped
+            for key, value in answers.items()
+        }
+        self.answersWRTMetadata = answersWRTMetadata
+        # constructed answers resolve their metadata contexts in one lookup
+        self.metadata_index = (
+            metadata_index(answersWRTMetadata) if answersWRTMetadata else None
+        )
+        self.outputs = outputs
+        # parts that cannot render only feed possible and constructed answers
+        self.walk_hidden = bool(outputs & form_hidden_outputs)
+
+        # top-level outputs; phases, sections and subform entries nest their
+        # own metadata, nested and possible dicts inside them
+        self.metadata_answers: Dict[str, Any] = {}
+        self.nested_answers: Dict[str, Any] = {}
+        self.flat_answers: Dict[str, Any] = {}
+        self.possible_answers: Dict[str, Any] = {}
+        self.constructed_answers: Dict[str, Any] = {}
+
+        # dependency results, only valid for these answers
+        self.dep_cache: Dict[Tuple, Dict[str, Any]] = {}
+        # context → visible required fields, see
+        # collect_visible_required_fields_from_phases
+        self.required_field_cache = RequiredFieldCache()
+        # opt-in instrumentation, see WalkStats; None walks uninstrumented
+        self.stats = stats
+        # subform tables with at least subform_threshold entries are walked in
+        # chunks of subform_chunksize entries on this executor, see walk_form
+        self.subform_executor: Optional[Executor] = None
+        self.subform_threshold = 256
+        self.subform_chunksize = 64
+
+    def views(
+        self,
+    ) -> Tuple[
+        Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any]
+    ]:
+        """
+        Returns the five outputs in walk_form order, unrequested ones empty.
+        """
+        views = (
+            self.metadata_answers,
+            self.nested_answers,
+            self.flat_answers,
+            self.possible_answers,
+            self.constructed_answers,
+        )
+        return tuple(  # type: ignore[return-value]
+            view if name in self.outputs else {}
+            for name, view in zip(form_output_names, views)
+        )
+
+    # lookups of the step bodies shared with the compiled walker, see engine.py
+
+    def child(self, context: int, segment: Any) -> int:
+        return self.paths.child(context, segment)
+
+    def option_index(self, field: dict) -> OptionIndex:
+        return form_part_memo(self.form, field.get("options", []), build_option_index)
+
+    def option_triggers(self, field: dict, position: int) -> List[dict]:
+        return field.get("options", [])[position].get("triggers", [])
+
+    def field_triggers(self, field: dict) -> List[dict]:
+        return field.get("triggers", [])
+
+    def trigger_type(self, trigger: dict) -> Optional[str]:
+        return trigger.get("type")
+
+    def trigger_id(self, trigger: dict) -> str:
+        return trigger.get("id", "")
+
+    def subform_phases(self, field: dict) -> Optional[List[dict]]:
+        return field["phases"] if "phases" in field else None
+
+    def subform_entries(self, context: int) -> List[str]:
+        stats = self.stats
+        started = stats.begin("subform_entries") if stats is not None else None
+        key = self.paths.key(context)
+        entries = self.answers.entries(subform_paths(self.form), key)
+        if stats is not None:
+            stats.end("subform_entries", started)
+        return entries
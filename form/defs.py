@@ -1,186 +1,703 @@
-from typing import List, Dict, Optional, Any
+import hashlib
+import json
+from collections import OrderedDict
+from threading import Lock
+from collections.abc import Mapping
+from typing import (
+    Callable,
+    List,
+    Dict,
+    FrozenSet,
+    Iterator,
+    Optional,
+    Any,
+    Set,
+    Tuple,
+    TypeVar,
+)
+from .answer import hashable_answer
 from .constant import form_context_split_str
+from .stats import WalkStats, current_stats
+
+
+class FormDefCache:
+    """
+    Thread-safe LRU cache of get_form_def results.
+
+    Entries are keyed by (form fingerprint, context), so forms sharing an id but
+    differing in content never see each other's definitions, and at most
+    maxsize entries are kept across all forms.
+    """
+
+    def __init__(self, maxsize: int = 65536) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple[str, str], Optional[dict]]" = OrderedDict()
+        self._lock = Lock()
+
+    def lookup(self, fingerprint: str, context: str) -> Tuple[bool, Optional[dict]]:
+        """
+        Returns (found, node); node may be None for contexts cached as missing.
+        """
+        key = (fingerprint, context)
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def store(self, fingerprint: str, context: str, node: Optional[dict]) -> None:
+        with self._lock:
+            self._entries[(fingerprint, context)] = node
+            self._entries.move_to_end((fingerprint, context))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, fingerprint: str) -> None:
+        """
+        Drops every entry of one form.
+        """
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == fingerprint]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+# answer keys read by a cached result and whether it read if there are any
+# answers at all
+_ReadKeys = Tuple[Tuple[str, ...], bool]
+
+
+class RequiredFieldCache:
+    """
+    Thread-safe cache of collect_visible_required_fields_from_phases results.
+
+    Entries are keyed by form fingerprint, then phase or section context, then
+    the answer keys the result's dependencies read, then the answers at those
+    keys. The last maxforms fingerprints are kept, and per context at most
+    maxvariants sets of keys read with maxresults answer combinations each,
+    evicting the least recently used.
+    """
+
+    def __init__(
+        self, maxforms: int = 16, maxvariants: int = 16, maxresults: int = 256
+    ) -> None:
+        self.maxforms = maxforms
+        self.maxvariants = maxvariants
+        self.maxresults = maxresults
+        # fingerprint → context → keys read → answers at them → result
+        self._forms: (
+            "OrderedDict[str, Dict[str, OrderedDict[_ReadKeys, "
+            "OrderedDict[Tuple, List[str]]]]]"
+        ) = OrderedDict()
+        self._lock = Lock()
+
+    def lookup(
+        self, fingerprint: str, context: str, answers: Mapping
+    ) -> Optional[Tuple[List[str], _ReadKeys]]:
+        """
+        Returns the result cached for answers that agree with these on the
+        keys it read, and those keys; None if there is none.
+        """
+        with self._lock:
+            contexts = self._forms.get(fingerprint)
+            if contexts is None:
+                return None
+            self._forms.move_to_end(fingerprint)
+            variants = contexts.get(context)
+            if variants is None:
+                return None
+            for read, results in variants.items():
+                values = _read_values(answers, *read)
+                if values is not None and values in results:
+                    variants.move_to_end(read)
+                    results.move_to_end(values)
+                    return results[values], read
+        return None
+
+    def store(
+        self,
+        fingerprint: str,
+        context: str,
+        read: _ReadKeys,
+        values: Tuple,
+        result: List[str],
+    ) -> None:
+        with self._lock:
+            contexts = self._forms.setdefault(fingerprint, {})
+            self._forms.move_to_end(fingerprint)
+            while len(self._forms) > self.maxforms:
+                self._forms.popitem(last=False)
+            variants = contexts.setdefault(context, OrderedDict())
+            results = variants.setdefault(read, OrderedDict())
+            variants.move_to_end(read)
+            while len(variants) > self.maxvariants:
+                variants.popitem(last=False)
+            results[values] = result
+            results.move_to_end(values)
+            while len(results) > self.maxresults:
+                results.popitem(last=False)
+
+    def invalidate(self, fingerprint: str) -> None:
+        """
+        Drops every entry of one form.
+        """
+        with self._lock:
+            self._forms.pop(fingerprint, None)
+
+    def invalidate_contexts(self, prefix: str) -> None:
+        """
+        Drops the entries of contexts starting with prefix, of every form.
+        """
+        with self._lock:
+            for contexts in self._forms.values():
+                for context in [c for c in contexts if c.startswith(prefix)]:
+                    del contexts[context]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._forms.clear()
+
 
 # Global caches
-form_field_defs_cache: Dict[str, dict] = {}
-required_field_cache: Dict[str, List[str]] = {}
+form_defs_cache = FormDefCache()
+required_field_cache = RequiredFieldCache()
+
+# form object id → (form, fingerprint); holding the form keeps its id unique
+_fingerprints: "OrderedDict[int, Tuple[dict, str]]" = OrderedDict()
+_fingerprints_lock = Lock()
+_fingerprints_maxsize = 64
+
+
+def _hash_deep(value: Any, digest: Any) -> None:
+    """
+    Feeds a canonical encoding of value to digest, with an explicit stack so
+    any nesting depth works. Markers are bytes, which JSON values never are.
+    """
+    stack: List[Any] = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, bytes):
+            digest.update(item)
+        elif isinstance(item, dict):
+            digest.update(b"{")
+            stack.append(b"}")
+            items = sorted(item.items(), key=lambda kv: str(kv[0]), reverse=True)
+            for key, val in items:
+                stack.append(b",")
+                stack.append(val)
+                stack.append(json.dumps(str(key)).encode("utf-8") + b":")
+        elif isinstance(item, (list, tuple)):
+            digest.update(b"[")
+            stack.append(b"]")
+            for val in reversed(item):
+                stack.append(b",")
+                stack.append(val)
+        else:
+            digest.update(json.dumps(item, default=str).encode("utf-8"))
+
+
+def form_fingerprint(form: dict, refresh: bool = False) -> str:
+    """
+    Returns a content hash of a form definition.
+
+    The hash is memoized per form object, so walks of the same object hash it
+    once; after editing a definition in place, call form_changed (or pass
+    refresh=True to only hash it again).
+    """
+    with _fingerprints_lock:
+        entry = _fingerprints.get(id(form))
+        if entry is not None and not refresh:
+            _fingerprints.move_to_end(id(form))
+            return entry[1]
+
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        encoded = json.dumps(form, sort_keys=True, separators=(",", ":"), default=str)
+    except RecursionError:
+        # nested deeper than the encoder can recurse
+        _hash_deep(form, digest)
+    else:
+        digest.update(encoded.encode("utf-8"))
+    fingerprint = digest.hexdigest()
+
+    with _fingerprints_lock:
+        _fingerprints[id(form)] = (form, fingerprint)
+        _fingerprints.move_to_end(id(form))
+        while len(_fingerprints) > _fingerprints_maxsize:
+            _fingerprints.popitem(last=False)
+    return fingerprint
+
+
+_T = TypeVar("_T")
+
+# (form fingerprint, id of a part of the form) → (part, value derived from it);
+# holding the part keeps its id unique
+_part_memo: "OrderedDict[Tuple[str, int], Tuple[Any, Any]]" = OrderedDict()
+_part_memo_lock = Lock()
+_part_memo_maxsize = 4096
+
+
+def form_part_memo(form: dict, part: Any, build: Callable[[Any], _T]) -> _T:
+    """
+    Returns build(part) for a part of a form definition (an options list, a
+    dependency's answers, ...), computed once per part and form fingerprint so
+    the raw-form walkers can reuse what compile_form precomputes for plans.
+    """
+    key = (form_fingerprint(form), id(part))
+    with _part_memo_lock:
+        entry = _part_memo.get(key)
+        if entry is not None and entry[0] is part:
+            _part_memo.move_to_end(key)
+            return entry[1]
+
+    value = build(part)
+    with _part_memo_lock:
+        _part_memo[key] = (part, value)
+        _part_memo.move_to_end(key)
+        while len(_part_memo) > _part_memo_maxsize:
+            _part_memo.popitem(last=False)
+    return value
+
+
+def form_changed(form: dict) -> str:
+    """
+    Declares that a form definition was edited in place: hashes it again and
+    drops the get_form_def entries, required fields and derived parts of its
+    previous content.
+    Returns the new fingerprint.
+    """
+    with _fingerprints_lock:
+        entry = _fingerprints.get(id(form))
+    previous = entry[1] if entry is not None else None
+    fingerprint = form_fingerprint(form, refresh=True)
+    if previous is not None and previous != fingerprint:
+        form_defs_cache.invalidate(previous)
+        required_field_cache.invalidate(previous)
+        with _part_memo_lock:
+            for key in [k for k in _part_memo if k[0] == previous]:
+                del _part_memo[key]
+    return fingerprint
+
+
+def subform_paths(form: dict) -> FrozenSet[Tuple[str, ...]]:
+    """
+    Returns the paths of the form's subformwtable fields, form id first and
+    "*" for subform entries, as AnswerStore.entries takes them. Computed once
+    per form fingerprint.
+    """
+    return form_part_memo(form, form, _find_subform_paths)
 
 
-def get_form_def(context: str, form: dict) -> Optional[dict]:
+def dependency_paths(form: dict) -> FrozenSet[Tuple[str, ...]]:
+    """
+    Returns every dependency and exclude path of the form's nodes, as in the
+    definition (below the form id, "*" for subform entries). Computed once per
+    form fingerprint.
+    """
+    return form_part_memo(form, form, _find_dependency_paths)
+
+
+def _find_dependency_paths(form: dict) -> FrozenSet[Tuple[str, ...]]:
+    paths: Set[Tuple[str, ...]] = set()
+    stack: List[Any] = [form]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, dict):
+            for dep in item.get("dependency") or []:
+                if isinstance(dep, dict):
+                    paths.add(tuple(dep.get("path", [])))
+                    paths.update(tuple(path) for path in dep.get("exclude", []))
+            stack.extend(
+                value
+                for key, value in item.items()
+                if key != "dependency" and isinstance(value, (dict, list))
+            )
+    return frozenset(paths)
+
+
+def _find_subform_paths(form: dict) -> FrozenSet[Tuple[str, ...]]:
+    paths: Set[Tuple[str, ...]] = set()
+    # (phases, path of their parent)
+    stack: List[Tuple[Any, Tuple[str, ...]]] = [
+        (form.get("phases", []), (form.get("id", "<no-id>"),))
+    ]
+    while stack:
+        phases, path = stack.pop()
+        # (section, path of the section's parent)
+        sections: List[Tuple[dict, Tuple[str, ...]]] = []
+        for phase in phases:
+            if isinstance(phase, dict) and isinstance(phase.get("sections"), list):
+                phase_path = path + (phase.get("id", "<no-id>"),)
+                sections.extend((s, phase_path) for s in phase["sections"])
+        while sections:
+            section, parent_path = sections.pop()
+            if not isinstance(section, dict) or not isinstance(
+                section.get("fields"), list
+            ):
+                continue
+            section_path = parent_path + (section.get("id", "<no-id>"),)
+            for field in section["fields"]:
+                if not isinstance(field, dict):
+                    continue
+                # triggered sections hang off the enclosing section's context
+                for opt in field.get("options", []):
+                    sections.extend((t, section_path) for t in opt.get("triggers", []))
+                sections.extend((t, section_path) for t in field.get("triggers", []))
+                if field.get("type") == "subformwtable" and "phases" in field:
+                    field_path = section_path + (field.get("id", "<no-id>"),)
+                    paths.add(field_path)
+                    stack.append((field["phases"], field_path + ("*",)))
+    return frozenset(paths)
+
+
+def get_form_def(context: str, form: dict, use_cache: bool = True) -> Optional[dict]:
     """
     Retrieves the node (phase/section/field) at the given context.
     Supports subform "*" and triggered sections.
+    Results are cached per form in form_defs_cache; pass use_cache=False to
+    bypass it.
     """
-    if context in form_field_defs_cache:
-        return form_field_defs_cache[context]
+    stats = current_stats.get()
+    if stats is None:
+        return _get_form_def(context, form, use_cache)
 
-    split = context.split(form_context_split_str)
-    current_form = form
-    current_phase = None
-    current_section = None
-    current_field = None
+    started = stats.begin("get_form_def")
+    try:
+        return _get_form_def(context, form, use_cache, stats)
+    finally:
+        stats.end("get_form_def", started)
 
-    for idx in range(1, len(split)):
-        key = split[idx]
 
-        if current_form:
-            phase = next(
-                (p for p in current_form.get("phases", []) if p["id"] == key), None
-            )
-            if not phase:
-                return None
-            current_form = None
-            current_phase = phase
+def _get_form_def(
+    context: str, form: dict, use_cache: bool, stats: Optional[WalkStats] = None
+) -> Optional[dict]:
+    if not use_cache:
+        return _find_form_def(context, form)
 
-            # return phase if last segment matches
-            if idx == len(split) - 1 and key == current_phase["id"]:
-                return current_phase
-            continue
+    fingerprint = form_fingerprint(form)
+    found, node = form_defs_cache.lookup(fingerprint, context)
+    if stats is not None:
+        stats.cache_lookup("form_defs_cache", found)
+    if not found:
+        node = _find_form_def(context, form)
+        form_defs_cache.store(fingerprint, context, node)
+    return node
 
-        if current_phase:
-            section = next(
-                (s for s in current_phase.get("sections", []) if s["id"] == key), None
-            )
-            if not section:
-                return None
-            current_phase = None
-            current_section = section
-
-            # return section if last segment matches
-            if idx == len(split) - 1 and key == current_section["id"]:
-                return current_section
-            continue
-
-        if current_section:
-            # 1) direct field match
-            field = next(
-                (f for f in current_section.get("fields", []) if f["id"] == key), None
-            )
-            if field:
-                current_field = field
-                if idx == len(split) - 1:
-                    form_field_defs_cache[context] = current_field
-                    return current_field
-                continue
 
-            # 2) triggered sections inside fields
-            matched_trigger = None
-            for field_i in current_section.get("fields", []):
-                # triggers inside options
-                for opt in field_i.get("options", []):
-                    for trig in opt.get("triggers", []):
-                        if trig["id"] == key:
-                            matched_trigger = trig
-                            break
-                    if matched_trigger:
-                        break
+# where a get_form_def lookup stands: the form, phase, section and field it is
+# looking in
+FormDefCursor = Tuple[Optional[dict], Optional[dict], Optional[dict], Optional[dict]]
+
+
+def form_def_step(
+    cursor: FormDefCursor, key: str
+) -> Tuple[Optional[FormDefCursor], Optional[dict]]:
+    """
+    Moves a get_form_def lookup past one context segment.
 
-                # triggers on field itself
-                for trig in field_i.get("triggers", []):
+    Returns the cursor to go on from (None when no longer context resolves)
+    and the definition the lookup returns if key is the last segment.
+    """
+    current_form, current_phase, current_section, current_field = cursor
+
+    if current_form:
+        phase = next(
+            (p for p in current_form.get("phases", []) if p["id"] == key), None
+        )
+        if not phase:
+            return None, None
+        # return phase if last segment matches
+        found = phase if key == phase["id"] else None
+        return (None, phase, current_section, current_field), found
+
+    if current_phase:
+        section = next(
+            (s for s in current_phase.get("sections", []) if s["id"] == key), None
+        )
+        if not section:
+            return None, None
+        # return section if last segment matches
+        found = section if key == section["id"] else None
+        return (current_form, None, section, current_field), found
+
+    if current_section:
+        # 1) direct field match
+        field = next(
+            (f for f in current_section.get("fields", []) if f["id"] == key), None
+        )
+        if field:
+            return (current_form, current_phase, current_section, field), field
+
+        # 2) triggered sections inside fields
+        matched_trigger = None
+        for field_i in current_section.get("fields", []):
+            # triggers inside options
+            for opt in field_i.get("options", []):
+                for trig in opt.get("triggers", []):
                     if trig["id"] == key:
                         matched_trigger = trig
                         break
-
                 if matched_trigger:
                     break
 
+            # triggers on field itself
+            for trig in field_i.get("triggers", []):
+                if trig["id"] == key:
+                    matched_trigger = trig
+                    break
+
             if matched_trigger:
-                current_section = matched_trigger
-                current_field = None
-                continue
+                break
 
-            return None
+        if matched_trigger:
+            return (current_form, current_phase, matched_trigger, None), None
 
-        if current_field:
-            if idx == len(split) - 1:
-                form_field_defs_cache[context] = current_field
-                return current_field
+        return None, None
+
+    if current_field:
+        if current_field.get("type") == "subformwtable" and key == "*":
+            subform = {"phases": current_field.get("phases", [])}
+            return (subform, current_phase, current_section, None), current_field
+        return cursor, current_field
+
+    return cursor, None
 
-            if current_field.get("type") == "subformwtable" and split[idx] == "*":
-                current_form = {"phases": current_field.get("phases", [])}
-                current_field = None
-                continue
 
-    return None
+def _find_form_def(context: str, form: dict) -> Optional[dict]:
+    split = context.split(form_context_split_str)
+    cursor: Optional[FormDefCursor] = (form, None, None, None)
+    found = None
+    for key in split[1:]:
+        if cursor is None:
+            return None
+        cursor, found = form_def_step(cursor, key)
+    return found
 
 
 def reset_required_field_cache():
-    global required_field_cache
-    required_field_cache = {}
+    required_field_cache.clear()
 
 
 def reset_required_field_cache_for_form(base_context: str):
-    global required_field_cache
-    keys_to_delete = [k for k in required_field_cache if k.startswith(base_context)]
-    for k in keys_to_delete:
-        del required_field_cache[k]
+    required_field_cache.invalidate_contexts(base_context)
+
+
+class _RecordingAnswers(Mapping):
+    """
+    Read-only view of an answers mapping that records the keys looked up into
+    the innermost of a stack of read sets.
+    """
+
+    __slots__ = ("_answers", "_frames")
+
+    def __init__(self, answers: Mapping, frames: List[Set[Any]]) -> None:
+        self._answers = answers
+        self._frames = frames
+
+    def __getitem__(self, key: str) -> Any:
+        self._frames[-1].add(key)
+        return self._answers[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self._frames[-1].add(key)
+        return self._answers.get(key, default)
+
+    def __contains__(self, key: object) -> bool:
+        self._frames[-1].add(key)
+        return key in self._answers
+
+    def __len__(self) -> int:
+        self._frames[-1].add(_READS_EMPTINESS)
+        return len(self._answers)
+
+    def __iter__(self) -> Iterator[str]:
+        self._frames[-1].add(_READS_ALL)
+        return iter(self._answers)
+
+
+# pseudo keys of _RecordingAnswers: whether there are answers at all, and
+# every answer (the result cannot be cached)
+_READS_EMPTINESS = object()
+_READS_ALL = object()
+_MISSING = object()
+
+
+def _read_values(
+    answers: Mapping, keys: Tuple[str, ...], reads_emptiness: bool
+) -> Optional[Tuple]:
+    try:
+        return (
+            bool(answers) if reads_emptiness else None,
+            tuple(
+                hashable_answer(answers[key]) if key in answers else _MISSING
+                for key in keys
+            ),
+        )
+    except TypeError:
+        return None
+
+
+# the sections a required-field walk continues with, with their paths; the
+# walk appends the required fields it meets on the way to its result list
+_RequiredChildren = Iterator[Tuple[dict, Tuple[str, ...]]]
 
 
 def collect_visible_required_fields_from_phases(
-    form: dict, phases: List[dict], base_context: str, answers: Dict[str, List[Any]]
+    form: dict,
+    phases: List[dict],
+    base_context: str,
+    answers: Dict[str, List[Any]],
+    cache: Optional[RequiredFieldCache] = None,
 ) -> List[str]:
     """
     Collect all required fields from phases, taking dependency visibility into account.
-    Uses caching to avoid repeated traversal.
+
+    Results are cached per phase and section context, together with the
+    answers their dependencies read; a cached list is reused for any answers
+    that agree on those keys, so it survives across submissions and edits of
+    unrelated answers. cache defaults to the module-wide required_field_cache,
+    pass a WalkContext.required_field_cache to keep it per walk.
+
+    The form is identified by its memoized form_fingerprint; after editing a
+    form in place, call form_changed before collecting again.
     """
 
     from .dependency import form_dep_data
 
+    if cache is None:
+        cache = required_field_cache
+    stats = current_stats.get()
+    fingerprint = form_fingerprint(form)
     required_contexts: List[str] = []
 
-    def walk_section(section: dict, path_parts: List[str]) -> List[str]:
-        section_context = form_context_split_str.join(path_parts)
-        if section_context in required_field_cache:
-            return required_field_cache[section_context]
-
-        local_required: List[str] = []
-
+    # answer keys read by each phase or section being walked, innermost last
+    frames: List[Set[Any]] = [set()]
+    recording = _RecordingAnswers(answers, frames)
+    # (node, context) → (canRender, answer keys read)
+    visibility: Dict[Tuple[int, str], Tuple[bool, FrozenSet[Any]]] = {}
+
+    def can_render(node: dict, context: str) -> bool:
+        key = (id(node), context)
+        if key not in visibility:
+            frames.append(set())
+            try:
+                dep_data = form_dep_data(form, node, context, recording)
+            finally:
+                reads = frames.pop()
+            visibility[key] = (dep_data["canRender"], frozenset(reads))
+        visible, keys_read = visibility[key]
+        frames[-1].update(keys_read)
+        return visible
+
+    def lookup(context: str) -> Optional[List[str]]:
+        found = cache.lookup(fingerprint, context, answers)
+        if found is None:
+            return None
+        result, (keys, reads_emptiness) = found
+        frames[-1].update(keys)
+        if reads_emptiness:
+            frames[-1].add(_READS_EMPTINESS)
+        return result
+
+    def store(context: str, reads: Set[Any], result: List[str]) -> None:
+        if _READS_ALL in reads:
+            return
+        keys = tuple(sorted(key for key in reads if isinstance(key, str)))
+        reads_emptiness = _READS_EMPTINESS in reads
+        values = _read_values(answers, keys, reads_emptiness)
+        if values is None:
+            return
+        cache.store(fingerprint, context, (keys, reads_emptiness), values, result)
+
+    def section_children(
+        section: dict, path: Tuple[str, ...], result: List[str]
+    ) -> _RequiredChildren:
         for field in section.get("fields", []):
-            path_parts.append(field["id"])
-            field_context = form_context_split_str.join(path_parts)
+            field_path = path + (field["id"],)
+            field_context = form_context_split_str.join(field_path)
 
-            dep_data = form_dep_data(form, field, field_context, answers)
-            if dep_data["canRender"]:
+            if can_render(field, field_context):
                 if field.get("required"):
-                    local_required.append(field_context)
+                    result.append(field_context)
 
                 # traverse triggers
                 for trig in field.get("triggers", []):
                     if trig.get("type") == "section":
-                        path_parts.append(trig["id"])
-                        local_required.extend(walk_section(trig, path_parts))
-                        path_parts.pop()
-
-            path_parts.pop()
-
-        required_field_cache[section_context] = local_required
-        return local_required
-
-    def walk_phase(phase: dict, path_parts: List[str]) -> List[str]:
-        path_parts.append(phase["id"])
-        phase_context = form_context_split_str.join(path_parts)
-        if phase_context in required_field_cache:
-            path_parts.pop()
-            return required_field_cache[phase_context]
+                        yield trig, field_path + (trig["id"],)
 
-        local_required: List[str] = []
-        dep_data = form_dep_data(form, phase, phase_context, answers)
-        if dep_data["canRender"]:
+    def phase_children(
+        phase: dict, path: Tuple[str, ...], result: List[str]
+    ) -> _RequiredChildren:
+        if can_render(phase, form_context_split_str.join(path)):
             for section in phase.get("sections", []):
-                path_parts.append(section["id"])
-                sec_dep_data = form_dep_data(
-                    form, section, form_context_split_str.join(path_parts), answers
-                )
-                if sec_dep_data["canRender"]:
-                    local_required.extend(walk_section(section, path_parts))
-                path_parts.pop()
-
-        required_field_cache[phase_context] = local_required
-        path_parts.pop()
-        return local_required
-
-    base_parts = [base_context]
+                section_path = path + (section["id"],)
+                if can_render(section, form_context_split_str.join(section_path)):
+                    yield section, section_path
+
+    # walks in progress, innermost last: (context, required fields so far,
+    # children still to walk); frames[i + 1] collects the reads of stack[i]
+    stack: List[Tuple[str, List[str], _RequiredChildren]] = []
+
+    def begin(
+        children_of: Callable[[dict, Tuple[str, ...], List[str]], _RequiredChildren],
+        node: dict,
+        path: Tuple[str, ...],
+    ) -> Optional[List[str]]:
+        # the cached result of the walk at path, else None once it is pushed
+        context = form_context_split_str.join(path)
+        result = lookup(context)
+        if stats is not None:
+            stats.cache_lookup("required_field_cache", result is not None)
+        if result is not None:
+            return result
+        frames.append(set())
+        local_required: List[str] = []
+        stack.append((context, local_required, children_of(node, path, local_required)))
+        return None
+
     for phase in phases:
-        required_contexts.extend(walk_phase(phase, base_parts))
+        result = begin(phase_children, phase, (base_context, phase["id"]))
+        if result is not None:
+            required_contexts.extend(result)
+        while stack:
+            context, local_required, children = stack[-1]
+            child = next(children, None)
+            if child is not None:
+                result = begin(section_children, *child)
+                if result is not None:
+                    local_required.extend(result)
+                continue
+
+            # the walk at the top is done: cache it and hand it to its parent
+            stack.pop()
+            reads = frames.pop()
+            store(context, reads, local_required)
+            frames[-1].update(reads)
+            if stack:
+                stack[-1][1].extend(local_required)
+            else:
+                required_contexts.extend(local_required)
 
     return required_contexts
@@ -1,18 +1,23 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Mapping, Optional, Sequence, Tuple, Union
 
 from .constant import form_context_split_str
-from .answer import get_form_answer, are_form_answers_equal
-from .defs import get_form_def
+from .answer import answer_multisets, get_form_answer, matches_any_answer
+from .defs import form_part_memo, get_form_def
+from .plan import OPTION_SOURCE_TYPES, build_option_index
+from .stats import current_stats
 
 
 def resolve_context_path(
-    form: dict, dep_path: List[str], context: str
+    form: dict, dep_path: List[str], context: Union[str, Sequence[str]]
 ) -> Dict[str, str]:
     """
     Resolves a dependency path that may contain '*' wildcards
     into a full context string.
+    context may also be given already split into its parts.
     """
-    context_parts = context.split(form_context_split_str)
+    context_parts = (
+        context.split(form_context_split_str) if isinstance(context, str) else context
+    )
     resolved_path = [
         (context_parts[i + 1] if p == "*" and (i + 1) < len(context_parts) else p)
         for i, p in enumerate(dep_path)
@@ -28,23 +33,75 @@ def resolve_context_path(
 
 
 def form_dep_data(
-    form: dict, node: dict, context: str, form_answers: Dict[str, List[Any]]
+    form: dict,
+    node: dict,
+    context: Union[str, Sequence[str]],
+    form_answers: Mapping[str, List[Any]],
+    cache: Optional[Dict[Tuple, Dict[str, Any]]] = None,
 ) -> Dict[str, Any]:
     """
     Resolves dependency data for a given form node (field or section)
+
+    cache is an optional walk-scoped memo. Results are keyed by the node and the
+    contexts its dependencies resolve to, so they are only valid for one set of
+    answers and must be treated as read-only.
     """
+    stats = current_stats.get()
+    if stats is None:
+        return _form_dep_data(form, node, context, form_answers, cache)
+
+    started = stats.begin("form_dep_data")
+    try:
+        return _form_dep_data(form, node, context, form_answers, cache)
+    finally:
+        stats.end("form_dep_data", started)
+
+
+def _form_dep_data(
+    form: dict,
+    node: dict,
+    context: Union[str, Sequence[str]],
+    form_answers: Mapping[str, List[Any]],
+    cache: Optional[Dict[Tuple, Dict[str, Any]]],
+) -> Dict[str, Any]:
     if not node.get("dependency"):
         return {"canRender": True, "options": [], "files": []}
 
     if not form_answers:
         return {"canRender": False, "options": [], "files": []}
 
+    if isinstance(context, str):
+        context = context.split(form_context_split_str)
+    resolved = [
+        resolve_context_path(form, dep["path"], context) for dep in node["dependency"]
+    ]
+    resolved_excludes = [
+        [
+            resolve_context_path(form, exclude_path, context)["wIdx"]
+            for exclude_path in dep.get("exclude", [])
+        ]
+        for dep in node["dependency"]
+    ]
+
+    # the parents of a dependency resolve to prefixes of the dependency itself,
+    # so the resolved targets and exclusions identify the result
+    cache_key: Tuple = ()
+    if cache is not None:
+        cache_key = (
+            id(node),
+            tuple(r["wIdx"] for r in resolved),
+            tuple(tuple(e) for e in resolved_excludes),
+        )
+        if cache_key in cache:
+            return cache[cache_key]
+
     can_render = True
     aggregated_options: List[dict] = []
     aggregated_files: List[dict] = []
 
-    for dep in node.get("dependency", []):
-        context_from_path = resolve_context_path(form, dep["path"], context)
+    for dep, context_from_path, exclude_contexts in zip(
+        node["dependency"], resolved, resolved_excludes
+    ):
 
         # --- CRITICAL dependency check (whole parent tree visibility) ---
         # Walk through all parent paths
@@ -56,7 +113,7 @@ def form_dep_data(
             def_from_target = get_form_def(parent_context["woIdx"], form)
             if def_from_target:
                 parent_dep_data = form_dep_data(
-                    form, def_from_target, parent_context["wIdx"], form_answers
+                    form, def_from_target, parent_context["wIdx"], form_answers, cache
                 )
                 can_render = can_render and parent_dep_data["canRender"]
         dep_answers = get_form_answer(context_from_path["wIdx"], form_answers)
@@ -68,28 +125,36 @@ def form_dep_data(
             if not dep.get("answers") and dep_answers:
                 this_visible = True
             elif dep.get("answers"):
-                for answer in dep["answers"]:
-                    if are_form_answers_equal(answer, dep_answers):
-                        this_visible = True
-                        break
+                this_visible = matches_any_answer(
+                    form_part_memo(form, dep["answers"], answer_multisets),
+                    dep["answers"],
+                    dep_answers,
+                )
             can_render = can_render and this_visible
 
         elif dep_type == "options":
             chosen_options: List[dict] = []
             if dep_answers:
                 def_from_target = get_form_def(context_from_path["woIdx"], form)
-                if def_from_target and def_from_target.get("type") in [
-                    "checkbox",
-                    "radio",
-                    "dropdown-multi-select",
-                    "dropdown-single-select",
-                ]:
+                if (
+                    def_from_target
+                    and def_from_target.get("type") in OPTION_SOURCE_TYPES
+                ):
                     options_from_target = def_from_target.get("options", [])
-                    chosen_options = [
-                        opt
-                        for opt in options_from_target
-                        if opt["value"] in dep_answers
-                    ]
+                    option_index = form_part_memo(
+                        form, options_from_target, build_option_index
+                    )
+                    if option_index.complete:
+                        chosen_options = [
+                            options_from_target[i]
+                            for i in option_index.matching(dep_answers, unique=True)
+                        ]
+                    else:
+                        chosen_options = [
+                            opt
+                            for opt in options_from_target
+                            if opt["value"] in dep_answers
+                        ]
 
             aggregated_options.extend(chosen_options)
             can_render = can_render and len(chosen_options) > 0
@@ -102,11 +167,8 @@ def form_dep_data(
                 final_files = dep_answers  # type: ignore
 
                 # handle exclusions
-                for exclude_path in dep.get("exclude", []):
-                    exclude_context = resolve_context_path(form, exclude_path, context)
-                    exclude_answers = get_form_answer(
-                        exclude_context["wIdx"], form_answers
-                    )
+                for exclude_context in exclude_contexts:
+                    exclude_answers = get_form_answer(exclude_context, form_answers)
                     final_files = [
                         f for f in final_files if f["id"] not in exclude_answers
                     ]
@@ -114,8 +176,11 @@ def form_dep_data(
             aggregated_files.extend(final_files)
             can_render = can_render and len(final_files) > 0
 
-    return {
+    result = {
         "canRender": can_render,
         "options": aggregated_options,
         "files": aggregated_files,
     }
+    if cache is not None:
+        cache[cache_key] = result
+    return result
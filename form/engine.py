@@ -0,0 +1,877 @@
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .answer import AnswerStore
+from .constant import form_context_split_str
+from .context import WalkContext
+from .defs import dependency_paths
+from .dependency import form_dep_data
+from .plan import CHOICE_FIELD_TYPES, TEXT_FIELD_TYPES
+from .stats import WalkStats
+
+# A step handles one node and pushes the steps for its children on the stack.
+# Children are pushed in reverse so they are popped, and walked, in the same
+# depth-first order the recursive walkers used, whatever the nesting depth.
+# Contexts are ids from ctx.paths; strings are only built where answers,
+# dependencies or outputs need them.
+Step = Callable[..., None]
+Task = Tuple[Step, Tuple[Any, ...]]
+
+
+def run(ctx: WalkContext, step: Step, args: Tuple[Any, ...]) -> None:
+    """
+    Walks from one node until its whole subtree is done.
+    """
+    if ctx.stats is not None:
+        _run_instrumented(ctx, ctx.stats, step, args)
+        return
+    stack: List[Task] = [(step, args)]
+    pop = stack.pop
+    while stack:
+        step, args = pop()
+        step(ctx, stack, *args)
+
+
+def _run_instrumented(
+    ctx: WalkContext, stats: WalkStats, step: Step, args: Tuple[Any, ...]
+) -> None:
+    """
+    run, timing every step into stats by walker level and node context.
+    """
+    paths = ctx.paths
+    stack: List[Task] = [(step, args)]
+    pop = stack.pop
+    while stack:
+        step, args = pop()
+        started = perf_counter()
+        step(ctx, stack, *args)
+        elapsed = perf_counter() - started
+
+        level, node_arg, context_arg = _STEP_INFO[step]
+        node = args[node_arg] if node_arg is not None else None
+        if isinstance(node, dict) and context_arg is not None:
+            node_id = node.get("id", "<no-id>")
+            if step is section_step and len(args) > 7 and args[7] is not None:
+                # per-file fileselect trigger
+                node_id = args[7]
+            stats.record_node(
+                level, paths.key(paths.child(args[context_arg], node_id)), elapsed
+            )
+        else:
+            stats.record_node(level, f"<{level}>", elapsed)
+
+
+# result of form_dep_data for nodes without dependencies; read-only
+_NO_DEPENDENCY: Dict[str, Any] = {"canRender": True, "options": [], "files": []}
+
+
+def _dep_data(ctx: WalkContext, node: dict, context: int) -> Dict[str, Any]:
+    if not node.get("dependency"):
+        return _NO_DEPENDENCY
+    return form_dep_data(
+        ctx.form, node, ctx.paths.parts(context), ctx.answers, ctx.dep_cache
+    )
+
+
+# The step bodies below are shared with the compiled walker in compiled.py.
+# Each walker reads what it needs off its own nodes, raw definitions here and
+# plan nodes there, and passes it in; anything else the bodies look up through
+# the walk, a WalkContext or the compiled walk, which both provide:
+#   child(context, segment)    the context one segment below context
+#   option_index(field)        the OptionIndex of a choice field's options
+#   option_triggers(field, i)  the triggers of the field's option at position i
+#   field_triggers(field)      the triggers of the field itself
+#   trigger_type(trigger)      a trigger's type
+#   trigger_id(trigger)        a trigger's id, as fileselect section ids use it
+#   subform_phases(field)      a subform table's phases, None without any
+#   subform_entries(context)   the answered entries of the table at context
+# and the metadata_index, answersWRTMetadata and subform_executor attributes.
+
+
+def enter_node(
+    node_id: str,
+    metadata_id: Optional[str],
+    canRender: bool,
+    metadata_context: Tuple[str, ...],
+    metadata_answers: Dict[str, Any],
+    nested_answers: Dict[str, Any],
+    possible_answers: Dict[str, Any],
+) -> Tuple[Tuple[str, ...], Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """
+    Opens a phase or section in the outputs. Returns the metadata context and
+    the metadata, nested and possible answers its children add to.
+    """
+    # Constructed Answers
+    if metadata_id:
+        metadata_context = metadata_context + (metadata_id,)
+
+    # Metadata answers
+    if canRender and metadata_id:
+        # Ensure a nested dict for this node inside the parent metadata dict
+        if metadata_id not in metadata_answers:
+            metadata_answers[metadata_id] = {}
+        nested_metadata_answers = metadata_answers[metadata_id]
+    else:
+        # No metadata → just use the same top-level dict
+        nested_metadata_answers = metadata_answers
+
+    # Nested answers
+    if canRender:
+        if node_id not in nested_answers:
+            nested_answers[node_id] = {}
+        nested_nested_answers = nested_answers[node_id]
+    else:
+        nested_nested_answers = nested_answers
+
+    # Possible answers
+    if node_id not in possible_answers:
+        possible_answers[node_id] = {}
+    nested_possible_answers = possible_answers[node_id]
+
+    return (
+        metadata_context,
+        nested_metadata_answers,
+        nested_nested_answers,
+        nested_possible_answers,
+    )
+
+
+def constructed_answer(
+    walk: Any,
+    metadata_context: Tuple[str, ...],
+    metadata_id: Optional[str],
+    field_type: Optional[str],
+) -> Optional[List[Any]]:
+    """
+    The constructed answer of a field, None if it has none.
+    """
+    # the index is only built when there are metadata answers
+    meta_index = walk.metadata_index
+    if (
+        not metadata_id
+        or meta_index is None
+        or not field_type
+        or field_type == "subformwtable"
+    ):
+        return None
+    nest = meta_index.resolve(metadata_context + (metadata_id,))
+    if nest != walk.answersWRTMetadata and isinstance(nest, list):
+        return nest
+    return None
+
+
+def add_field_answers(
+    field_id: str,
+    field_type: Optional[str],
+    metadata_id: Optional[str],
+    value: List[Any],
+    canRender: bool,
+    renders: bool,
+    metadata_answers: Dict[str, Any],
+    nested_answers: Dict[str, Any],
+    possible_answers: Dict[str, Any],
+    flat_answers: Dict[str, Any],
+) -> None:
+    """
+    Adds a field's answers to the metadata, nested, flat and possible answers.
+    renders is canRender and the field's own dependencies.
+    """
+    # Metadata answers
+    if canRender and metadata_id:
+        if value:  # regular field has answers
+            if metadata_id not in metadata_answers:
+                metadata_answers[metadata_id] = []
+            metadata_answers[metadata_id].extend(value)
+
+    # add answers
+    if value and renders:
+        # Nested answers
+        if field_id not in nested_answers:
+            nested_answers[field_id] = []
+        nested_answers[field_id].extend(value)
+
+        # Flat answers
+        # assign if no field exists with same field_id
+        if field_id not in flat_answers:
+            flat_answers[field_id] = []
+        flat_answers[field_id].append(value)
+
+    # Possible answers
+    # only then don't create empty array of answers if the field is of type subformwtable
+    if field_id not in possible_answers and field_type != "subformwtable":
+        possible_answers[field_id] = []
+        if value:
+            possible_answers[field_id].extend(value)
+
+
+def triggered_sections(
+    walk: Any, field: Any, field_type: Optional[str], value: List[Any], renders: bool
+) -> List[Tuple[Any, Optional[str], bool]]:
+    """
+    The trigger sections a field walks, in walk order, as (trigger, section id,
+    canRender); the section id is None where the trigger's own id is used.
+    """
+    triggered: List[Tuple[Any, Optional[str], bool]] = []
+
+    if field_type in CHOICE_FIELD_TYPES:
+        option_index = walk.option_index(field)
+        selected = option_index.matching(value)
+        for position in selected:
+            for trig in walk.option_triggers(field, position):
+                if walk.trigger_type(trig) == "section":
+                    triggered.append((trig, None, renders))
+
+        # for possible answers
+        selected_positions = set(selected)
+        for position in option_index.triggered:
+            if position in selected_positions:
+                continue
+            for trig in walk.option_triggers(field, position):
+                if walk.trigger_type(trig) == "section":
+                    triggered.append((trig, None, False))
+
+    elif field_type in TEXT_FIELD_TYPES:
+        if value and value[0] != "":
+            for trig in walk.field_triggers(field):
+                triggered.append((trig, None, renders))
+        # for possible answers
+        else:
+            for trig in walk.field_triggers(field):
+                if walk.trigger_type(trig) == "section":
+                    triggered.append((trig, None, False))
+
+    elif field_type == "fileselect":
+        # every selected file walks the field's trigger sections themselves,
+        # under the section id suffixed with the file id
+        for ans_id in value:
+            for trig in walk.field_triggers(field):
+                triggered.append((trig, f"{walk.trigger_id(trig)}_{ans_id}", renders))
+        # for possible_answers
+        for trig in walk.field_triggers(field):
+            if walk.trigger_type(trig) == "section":
+                section_id = f"{walk.trigger_id(trig)}___for_possible_answers__"
+                triggered.append((trig, section_id, False))
+
+    return triggered
+
+
+def subform_tasks(
+    walk: Any,
+    phase_step: Step,
+    field: Any,
+    phases: Sequence[Any],
+    context: Any,
+    metadata_context: Tuple[str, ...],
+    metadata_id: Optional[str],
+    canRender: bool,
+    renders: bool,
+    metadata_answers: Dict[str, Any],
+    nested_answers: Dict[str, Any],
+    possible_answers: Dict[str, Any],
+) -> List[Task]:
+    """
+    The steps walking the entries of the subform table field at context, in
+    walk order. phase_step is the walker's step for the subform's phases.
+    """
+    children: List[Task] = []
+
+    # Constructed answers
+    meta_index = walk.metadata_index
+    if metadata_id and meta_index is not None:
+        derived_metadata_context = metadata_context + (metadata_id,)
+
+        # todo use uuid from answersWRTMetadata to construct metadata_context
+        # entry_metadata_context = metadata_context
+
+        nest = meta_index.resolve(derived_metadata_context)
+        if nest != walk.answersWRTMetadata and isinstance(nest, dict):
+            for k in nest:
+                entry_context = walk.child(context, k)
+                entry_metadata_context = derived_metadata_context + (k,)
+
+                for phase in phases:
+                    children.append(
+                        (
+                            phase_step,
+                            (
+                                phase,
+                                entry_context,
+                                entry_metadata_context,
+                                False,
+                                metadata_answers,
+                                nested_answers,
+                                possible_answers,
+                            ),
+                        )
+                    )
+
+    if canRender and metadata_id:
+        if metadata_id not in metadata_answers:
+            metadata_answers[metadata_id] = {}
+
+        # Extract all subform entry indices (n) from the answers, the
+        # segments immediately below the subform's context, in the order
+        # they were answered
+        entries = walk.subform_entries(context)
+
+        # large tables are walked on the executor, in chunks of entries
+        executor = walk.subform_executor
+        if executor is not None and len(entries) >= max(walk.subform_threshold, 1):
+            children.append(
+                (
+                    _parallel_entries_step,
+                    (
+                        field,
+                        context,
+                        entries,
+                        renders,
+                        metadata_answers[metadata_id],
+                        nested_answers,
+                        possible_answers,
+                    ),
+                )
+            )
+            return children
+
+        # Walk each subform entry
+        for n in entries:
+            entry_context = walk.child(context, n)
+            # Temporary dict to hold nested metadata answers for this entry
+            nested_metadata_answers: Dict[str, Any] = {}
+            nested_nested_answers: Dict[str, Any] = {}
+            nested_possible_answers: Dict[str, Any] = {}
+
+            for phase in phases:
+                children.append(
+                    (
+                        phase_step,
+                        (
+                            phase,
+                            entry_context,
+                            # empty to not add unwanted answers
+                            (),
+                            True,
+                            nested_metadata_answers,
+                            nested_nested_answers,
+                            nested_possible_answers,
+                        ),
+                    )
+                )
+            children.append(
+                (
+                    entry_done_step,
+                    (
+                        n,
+                        renders,
+                        nested_metadata_answers,
+                        nested_nested_answers,
+                        nested_possible_answers,
+                        metadata_answers[metadata_id],
+                        nested_answers,
+                        possible_answers,
+                    ),
+                )
+            )
+
+    else:
+        # for possible answers
+        nested_possible_answers = {}
+
+        entry_context = walk.child(context, "__for_possible_answers__")
+        for phase in phases:
+            children.append(
+                (
+                    phase_step,
+                    (
+                        phase,
+                        entry_context,
+                        # empty to not add unwanted answers
+                        (),
+                        False,
+                        metadata_answers,
+                        nested_answers,
+                        nested_possible_answers,
+                    ),
+                )
+            )
+        children.append(
+            (
+                entry_done_step,
+                (
+                    "__uuid_for_possible_answers__",
+                    False,
+                    {},
+                    {},
+                    nested_possible_answers,
+                    {},
+                    nested_answers,
+                    possible_answers,
+                ),
+            )
+        )
+
+    return children
+
+
+def phase_step(
+    ctx: WalkContext,
+    stack: List[Task],
+    phase: dict,
+    context: int,
+    metadata_context: Tuple[str, ...],
+    canRender: bool,
+    metadata_answers: Dict[str, Any],  # can be nested dict
+    nested_answers: Dict[str, Any],
+    possible_answers: Dict[str, Any],
+) -> None:
+    # walks of parts that cannot render only feed possible and constructed answers
+    if not canRender and not ctx.walk_hidden:
+        return
+
+    phase_id = phase.get("id", "<no-id>")
+    derived_context = ctx.paths.child(context, phase_id)
+
+    sections = phase.get("sections", [])
+    if not isinstance(sections, list):
+        print(f"⚠️ sections missing or not a list in phase {phase_id}")
+        return
+
+    (
+        derived_metadata_context,
+        nested_metadata_answers,
+        nested_nested_answers,
+        nested_possible_answers,
+    ) = enter_node(
+        phase_id,
+        phase.get("metadata", {}).get("id"),
+        canRender,
+        metadata_context,
+        metadata_answers,
+        nested_answers,
+        possible_answers,
+    )
+
+    for section in reversed(sections):
+        stack.append(
+            (
+                _phase_section_step,
+                (
+                    phase_id,
+                    section,
+                    derived_context,
+                    derived_metadata_context,
+                    canRender,
+                    nested_metadata_answers,
+                    nested_nested_answers,
+                    nested_possible_answers,
+                ),
+            )
+        )
+
+
+def _phase_section_step(
+    ctx: WalkContext,
+    stack: List[Task],
+    phase_id: str,
+    section: Any,
+    context: int,
+    metadata_context: Tuple[str, ...],
+    canRender: bool,
+    metadata_answers: Dict[str, Any],
+    nested_answers: Dict[str, Any],
+    possible_answers: Dict[str, Any],
+) -> None:
+    if not isinstance(section, dict):
+        print(f"⚠️ skipping invalid section in phase {phase_id}")
+        return
+
+    dep_data = _dep_data(ctx, section, context)
+    # if the phase can render and the section can render then handle the premium answers,
+    # else walk for non-premium answers
+    section_step(
+        ctx,
+        stack,
+        section,
+        context,
+        metadata_context,
+        canRender and dep_data.get("canRender", True),
+        metadata_answers,
+        nested_answers,
+        possible_answers,
+    )
+
+
+def section_step(
+    ctx: WalkContext,
+    stack: List[Task],
+    section: dict,
+    context: int,
+    metadata_context: Tuple[str, ...],
+    canRender: bool,
+    metadata_answers: Dict[str, Any],  # nested dict passed from phase
+    nested_answers: Dict[str, Any],
+    possible_answers: Dict[str, Any],
+    section_id: Optional[str] = None,
+) -> None:
+    # walks of parts that cannot render only feed possible and constructed answers
+    if not canRender and not ctx.walk_hidden:
+        return
+
+    # section_id differs from the section's own id for per-file fileselect triggers
+    if section_id is None:
+        section_id = section.get("id", "<no-id>")
+    derived_context = ctx.paths.child(context, section_id)
+    (
+        derived_metadata_context,
+        nested_metadata_answers,
+        nested_nested_answers,
+        nested_possible_answers,
+    ) = enter_node(
+        section_id,
+        section.get("metadata", {}).get("id"),
+        canRender,
+        metadata_context,
+        metadata_answers,
+        nested_answers,
+        possible_answers,
+    )
+
+    fields = section.get("fields", [])
+    if not isinstance(fields, list):
+        print(f"⚠️ section.fields missing or not a list in section {section_id}")
+        return
+
+    for field in reversed(fields):
+        stack.append(
+            (
+                _section_field_step,
+                (
+                    section_id,
+                    field,
+                    derived_context,
+                    derived_metadata_context,
+                    canRender,
+                    nested_metadata_answers,
+                    nested_nested_answers,
+                    nested_possible_answers,
+                ),
+            )
+        )
+
+
+def _section_field_step(
+    ctx: WalkContext,
+    stack: List[Task],
+    section_id: str,
+    field: Any,
+    context: int,
+    metadata_context: Tuple[str, ...],
+    canRender: bool,
+    metadata_answers: Dict[str, Any],
+    nested_answers: Dict[str, Any],
+    possible_answers: Dict[str, Any],
+) -> None:
+    if not isinstance(field, dict):
+        print(f"⚠️ skipping invalid field in section {section_id}")
+        return
+
+    dep_data = _dep_data(ctx, field, context)
+    # Pass metadata_answers so the field can add its answers under this section's metadata
+    field_step(
+        ctx,
+        stack,
+        field,
+        context,
+        metadata_context,
+        canRender and dep_data.get("canRender", True),
+        metadata_answers,
+        nested_answers,
+        possible_answers,
+    )
+
+
+def field_step(
+    ctx: WalkContext,
+    stack: List[Task],
+    field: dict,
+    context: int,
+    metadata_context: Tuple[str, ...],
+    canRender: bool,
+    metadata_answers: Dict[str, Any],  # dict keyed by metadata.id
+    nested_answers: Dict[str, Any],
+    possible_answers: Dict[str, Any],
+) -> None:
+    # walks of parts that cannot render only feed possible and constructed answers
+    if not canRender and not ctx.walk_hidden:
+        return
+
+    field_id = field.get("id", "<no-id>")
+    field_type = field.get("type")
+    derived_context = ctx.paths.child(context, field_id)
+
+    # dependency data
+    dep_data = _dep_data(ctx, field, derived_context)
+    # if not dep_data.get("canRender", True):
+    #     print(f"🔒 Field {field_id} not renderable, skipping")
+    #     return
+    renders = canRender and dep_data.get("canRender", True)
+
+    value = ctx.answer_ids.get(derived_context, [])
+
+    metadata_id = field.get("metadata", {}).get("id")
+    # Constructed answers
+    if "constructed" in ctx.outputs:
+        nest = constructed_answer(ctx, metadata_context, metadata_id, field_type)
+        if nest is not None:
+            ctx.constructed_answers[ctx.paths.key(derived_context)] = nest
+
+    add_field_answers(
+        field_id,
+        field_type,
+        metadata_id,
+        value,
+        canRender,
+        renders,
+        metadata_answers,
+        nested_answers,
+        possible_answers,
+        ctx.flat_answers,
+    )
+
+    phases = ctx.subform_phases(field) if field_type == "subformwtable" else None
+    if phases is not None:
+        children = subform_tasks(
+            ctx,
+            phase_step,
+            field,
+            phases,
+            derived_context,
+            metadata_context,
+            metadata_id,
+            canRender,
+            renders,
+            metadata_answers,
+            nested_answers,
+            possible_answers,
+        )
+        stack.extend(reversed(children))
+        return
+
+    # Handle triggers
+    triggered = triggered_sections(ctx, field, field_type, value, renders)
+    for trig, section_id, trig_can_render in reversed(triggered):
+        stack.append(
+            (
+                section_step,
+                (
+                    trig,
+                    context,
+                    metadata_context,
+                    trig_can_render,
+                    metadata_answers,
+                    nested_answers,
+                    possible_answers,
+                    section_id,
+                ),
+            )
+        )
+
+
+def entry_done_step(
+
+    ctx: WalkContext,
+    stack: List[Task],
+    n: str,
+    renders: bool,
+    entry_metadata_answers: Dict[str, Any],
+    entry_nested_answers: Dict[str, Any],
+    entry_possible_answers: Dict[str, Any],
+    subform_metadata_answers: Dict[str, Any],
+    nested_answers: Dict[str, Any],
+    possible_answers: Dict[str, Any],
+) -> None:
+    # Only append if any nested field has metadata answers
+    if renders:
+        if entry_metadata_answers:
+            subform_metadata_answers[n] = entry_metadata_answers
+        if entry_nested_answers:
+            nested_answers[n] = entry_nested_answers
+    if entry_possible_answers:
+        possible_answers[n] = entry_possible_answers
+
+
+# per entry: (n, metadata, nested and possible answers)
+_EntryOutputs = Tuple[str, Dict[str, Any], Dict[str, Any], Dict[str, Any]]
+
+
+def walk_subform_entries(
+    form: dict,
+    answers: Union[Dict[str, List[Any]], AnswerStore],
+    answersWRTMetadata: Optional[dict],
+    outputs: FrozenSet[str],
+    subform_context: str,
+    entries: List[str],
+    phases: List[dict],
+) -> Tuple[List[_EntryOutputs], Dict[str, Any], Dict[str, Any]]:
+    """
+    Walks some entries of a subform table on their own, as field_step would.
+
+    Returns the outputs of each entry, then the flat and constructed answers,
+    for the caller to merge in entry order. Runs in executor threads or
+    processes; it shares no mutable state with the walk it was split from.
+    answers only need to hold the entries' answers and those dependencies
+    can read outside the table, see _chunk_answers.
+    """
+    entry_contexts = [f"{subform_context}{form_context_split_str}{n}" for n in entries]
+    ctx = WalkContext(form, answers, answersWRTMetadata, outputs, scope=entry_contexts)
+
+    results: List[_EntryOutputs] = []
+    for n, entry_key in zip(entries, entry_contexts):
+        entry_context = ctx.paths.intern(entry_key)
+        entry_metadata_answers: Dict[str, Any] = {}
+        entry_nested_answers: Dict[str, Any] = {}
+        entry_possible_answers: Dict[str, Any] = {}
+        for phase in phases:
+            run(
+                ctx,
+                phase_step,
+                (
+                    phase,
+                    entry_context,
+                    # empty to not add unwanted answers
+                    (),
+                    True,
+                    entry_metadata_answers,
+                    entry_nested_answers,
+                    entry_possible_answers,
+                ),
+            )
+        results.append(
+            (n, entry_metadata_answers, entry_nested_answers, entry_possible_answers)
+        )
+
+    return results, ctx.flat_answers, ctx.constructed_answers
+
+
+def _parallel_entries_step(
+    ctx: WalkContext,
+    stack: List[Task],
+    field: dict,
+    context: int,
+    entries: List[str],
+    renders: bool,
+    subform_metadata_answers: Dict[str, Any],
+    nested_answers: Dict[str, Any],
+    possible_answers: Dict[str, Any],
+) -> None:
+    # walks the entries in chunks on ctx.subform_executor, then merges them
+    # in entry order, exactly where the serial walk would have walked them
+    executor = ctx.subform_executor
+    assert executor is not None
+    chunksize = max(ctx.subform_chunksize, 1)
+    subform_context = ctx.paths.key(context)
+    chunks = [
+        entries[start : start + chunksize]
+        for start in range(0, len(entries), chunksize)
+    ]
+    if isinstance(executor, ThreadPoolExecutor):
+        # threads share the answers as they are
+        chunk_answers: List[Any] = [ctx.answers] * len(chunks)
+    else:
+        # anything else may pickle them with every chunk
+        chunk_answers = _chunk_answers(ctx, subform_context, chunks)
+    futures = [
+        executor.submit(
+            walk_subform_entries,
+            ctx.form,
+            answers,
+            ctx.answersWRTMetadata,
+            ctx.outputs,
+            subform_context,
+            chunk,
+            field["phases"],
+        )
+        for chunk, answers in zip(chunks, chunk_answers)
+    ]
+
+    for future in futures:
+        results, flat_answers, constructed_answers = future.result()
+        for n, entry_metadata, entry_nested, entry_possible in results:
+            entry_done_step(
+                ctx,
+                stack,
+                n,
+                renders,
+                entry_metadata,
+                entry_nested,
+                entry_possible,
+                subform_metadata_answers,
+                nested_answers,
+                possible_answers,
+            )
+        for key, values in flat_answers.items():
+            ctx.flat_answers.setdefault(key, []).extend(values)
+        ctx.constructed_answers.update(constructed_answers)
+
+
+def _chunk_answers(
+    ctx: WalkContext, subform_context: str, chunks: List[List[str]]
+) -> List[Dict[str, List[Any]]]:
+    """
+    Returns the answers each chunk of table entries needs: those of its own
+    entries, every answer outside the table, which dependencies may read, and
+    the entries of the table that dependency paths name explicitly.
+    """
+    # one pass, keeping the answers' order for the entry order of nested tables
+    prefix = subform_context + form_context_split_str
+    shared: Dict[str, List[Any]] = {}
+    by_entry: Dict[str, Dict[str, List[Any]]] = {}
+    for key, value in ctx.answers.items():
+        if key.startswith(prefix):
+            n = key[len(prefix) :].partition(form_context_split_str)[0]
+            by_entry.setdefault(n, {})[key] = value
+        else:
+            shared[key] = value
+
+    # dependency paths matching the table's context, "*" matching any entry,
+    # followed by an entry id
+    table = subform_context.split(form_context_split_str)[1:]
+    for path in dependency_paths(ctx.form):
+        if (
+            len(path) > len(table)
+            and path[len(table)] != "*"
+            and all(p in ("*", t) for p, t in zip(path, table))
+        ):
+            shared.update(by_entry.get(path[len(table)], {}))
+
+    result = []
+    for chunk in chunks:
+        answers = dict(shared)
+        for n in chunk:
+            answers.update(by_entry.get(n, {}))
+        result.append(answers)
+    return result
+
+
+# step → (walker level, position of its node and of the node's parent context
+# in the step's arguments), for _run_instrumented
+_STEP_INFO: Dict[Step, Tuple[str, Optional[int], Optional[int]]] = {
+    phase_step: ("phase", 0, 1),
+    _phase_section_step: ("section", 1, 2),
+    section_step: ("section", 0, 1),
+    _section_field_step: ("field", 1, 2),
+    field_step: ("field", 0, 1),
+    entry_done_step: ("entry", None, None),
+    _parallel_entries_step: ("field", 0, 1),
+}
@@ -1,71 +1,109 @@
-from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import Executor
+from typing import Dict, Any, FrozenSet, Iterable, Optional, Tuple, Union
+from .answer import AnswerStore
+from .constant import all_form_outputs, form_output_names
+from .context import WalkContext
 from .dependency import form_dep_data
 from .phase import walk_phase
+from .stats import WalkStats, current_stats
+
+
+def requested_outputs(outputs: Optional[Iterable[str]]) -> FrozenSet[str]:
+    """
+    Validates an outputs= argument; None requests every view.
+    """
+    if outputs is None:
+        return all_form_outputs
+    requested = frozenset(outputs)
+    unknown = requested - all_form_outputs
+    if unknown:
+        raise ValueError(
+            f"unknown outputs {sorted(unknown)}, expected some of {form_output_names}"
+        )
+    return requested
 
 
 def walk_form(
-    form: dict, answers: dict, answersWRTMetadata: Optional[dict]
+    form: dict,
+    answers: Union[dict, AnswerStore],
+    answersWRTMetadata: Optional[dict],
+    outputs: Optional[Iterable[str]] = None,
+    stats: Optional[WalkStats] = None,
+    subform_executor: Optional[Executor] = None,
+    subform_threshold: int = 256,
+    subform_chunksize: int = 64,
 ) -> Tuple[
     Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any]
 ]:
     """
     Walk an entire form and collect all answers organized by metadata.id
+    answers may be a plain dict or a prebuilt AnswerStore.
+
+    outputs names the views to compute (see form_output_names); the others are
+    returned empty and the walks that only feed them are skipped. Requested
+    views are the same as in a full walk.
+
+    stats, or an already active WalkStats, records call counts, timings and
+    cache hit rates of the walk; see form.stats.
+
+    With a subform_executor, subform tables with at least subform_threshold
+    entries are walked in chunks of subform_chunksize entries on it, thread or
+    process pool, and merged in entry order into the same outputs. A process
+    pool receives the form with every chunk, but of the answers only the
+    chunk's entries and those outside the table.
+
+    Definitions are cached per form object; call form.defs.form_changed after
+    editing one in place.
     """
-    form_id = form.get("id", "<no-id>")
-    derived_context = form_id
-    derived_metadata_context = []
+    outputs = requested_outputs(outputs)
+    if stats is None:
+        stats = current_stats.get()
+    elif stats is not current_stats.get():
+        token = stats.activate()
+        try:
+            return walk_form(
+                form,
+                answers,
+                answersWRTMetadata,
+                outputs,
+                stats,
+                subform_executor,
+                subform_threshold,
+                subform_chunksize,
+            )
+        finally:
+            stats.deactivate(token)
 
-    # This will store the structured answers: metadata.id → list of answers
-    metadata_answers: Dict[str, List[Any]] = {}
-    nested_answers: Dict[str, Any] = {}
-    flat_answers: Dict[str, Any] = {}
-    possible_answers: Dict[str, Any] = {}
+    started = stats.begin("walk_form") if stats is not None else None
+    ctx = WalkContext(form, answers, answersWRTMetadata, outputs, stats)
+    ctx.subform_executor = subform_executor
+    ctx.subform_threshold = subform_threshold
+    ctx.subform_chunksize = subform_chunksize
 
-    constructed_answers: Dict[str, Any] = {}
+    form_id = form.get("id", "<no-id>")
+    derived_context = form_id
 
     phases = form.get("phases", [])
 
     # collect renderable phases
     for phase in phases:
-        dep_data = form_dep_data(form, phase, derived_context, answers)
+        dep_data = form_dep_data(
+            form, phase, derived_context, ctx.answers, ctx.dep_cache
+        )
         if not isinstance(phase, dict):
             print(f"⚠️ skipping invalid phase in form {form_id}")
             continue
-        if dep_data.get("canRender", True):
-            walk_phase(
-                form,
-                phase,
-                derived_context,
-                derived_metadata_context,
-                answers,
-                answersWRTMetadata,
-                True,
-                metadata_answers,
-                nested_answers,
-                flat_answers,
-                possible_answers,
-                constructed_answers,
-            )
-        else:
-            walk_phase(
-                form,
-                phase,
-                derived_context,
-                derived_metadata_context,
-                answers,
-                answersWRTMetadata,
-                False,
-                metadata_answers,
-                nested_answers,
-                flat_answers,
-                possible_answers,
-                constructed_answers,
-            )
+        walk_phase(
+            ctx,
+            phase,
+            derived_context,
+            (),
+            dep_data.get("canRender", True),
+            ctx.metadata_answers,
+            ctx.nested_answers,
+            ctx.possible_answers,
+        )
 
-    return (
-        metadata_answers,
-        nested_answers,
-        flat_answers,
-        possible_answers,
-        constructed_answers,
-    )
+    if stats is not None:
+        stats.end("walk_form", started)
+    return ctx.views()
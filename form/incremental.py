@@ -0,0 +1,372 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .answer import AnswerStore
+from .compiled import walk_compiled_segment
+from .constant import form_context_split_str
+from .plan import FormPlan
+
+# metadata, nested, flat, possible and constructed answers of one segment
+_Outputs = Tuple[
+    Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any]
+]
+
+# positions of the outputs in _Outputs
+_METADATA, _NESTED, _FLAT, _POSSIBLE, _CONSTRUCTED = range(5)
+
+_MISSING = object()
+# set in a Touched level whose keys may have changed order
+_REORDER = object()
+
+# key → True for a value to merge again, or the Touched of a dict value whose
+# other keys are unchanged; _REORDER → True
+Touched = Dict[Any, Any]
+
+
+class WalkResult:
+    """
+    Outputs of walk_incremental plus the state update_walk needs to patch them.
+
+    The form is walked in segments, one per section of a top-level phase, and
+    the five outputs are the ordered merge of the segment outputs. Unpacks like
+    the walk_form tuple:
+
+        metadata, nested, flat, possible, constructed = walk_incremental(...)
+    """
+
+    __slots__ = (
+        "plan",
+        "answers",
+        "store",
+        "answersWRTMetadata",
+        "segments",
+        "segment_outputs",
+        "outputs",
+    )
+
+    def __init__(
+        self,
+        plan: FormPlan,
+        answers: Dict[str, List[Any]],
+        answersWRTMetadata: Optional[dict],
+    ) -> None:
+        self.plan = plan
+        # the caller's dict, update_walk re-reads changed keys from it
+        self.answers = answers
+        self.store = AnswerStore(answers)
+        self.answersWRTMetadata = answersWRTMetadata
+        # (top-level phase index, section indices walked in that segment)
+        self.segments: List[Tuple[int, Tuple[int, ...]]] = []
+        self.segment_outputs: List[_Outputs] = []
+        self.outputs: _Outputs = ({}, {}, {}, {}, {})
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.outputs)
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.outputs[_METADATA]
+
+    @property
+    def nested(self) -> Dict[str, Any]:
+        return self.outputs[_NESTED]
+
+    @property
+    def flat(self) -> Dict[str, Any]:
+        return self.outputs[_FLAT]
+
+    @property
+    def possible(self) -> Dict[str, Any]:
+        return self.outputs[_POSSIBLE]
+
+    @property
+    def constructed(self) -> Dict[str, Any]:
+        return self.outputs[_CONSTRUCTED]
+
+
+def walk_incremental(
+    plan: FormPlan, answers: Dict[str, List[Any]], answersWRTMetadata: Optional[dict]
+) -> WalkResult:
+    """
+    Walks a compiled form like walk_compiled, keeping what update_walk needs.
+
+    Args:
+        plan: The compiled form.
+        answers: The answers dict. It is not copied: mutate it and pass the
+            changed keys to update_walk to refresh the result.
+        answersWRTMetadata: The metadata answers, assumed not to change.
+
+    Returns:
+        A WalkResult holding the same five outputs as walk_compiled.
+    """
+    result = WalkResult(plan, answers, answersWRTMetadata)
+    result.segments = plan_segments(plan)
+
+    dep_cache: Dict[Tuple, Dict[str, Any]] = {}
+    for phase_index, sections in result.segments:
+        result.segment_outputs.append(
+            walk_compiled_segment(
+                plan,
+                result.store,
+                answersWRTMetadata,
+                phase_index,
+                sections,
+                dep_cache,
+            )
+        )
+
+    for position in range(5):
+        _rebuild(result, position)
+    return result
+
+
+def plan_segments(plan: FormPlan) -> List[Tuple[int, Tuple[int, ...]]]:
+    """
+    Splits a plan into walk segments, one per section of a top-level phase, as
+    (phase index, section indices) in walk order. Walking each segment with
+    walk_compiled_segment and merging the outputs in this order with
+    merge_output gives the walk_compiled outputs.
+    """
+    segments: List[Tuple[int, Tuple[int, ...]]] = []
+    for phase_index in plan.phases:
+        sections = plan.nodes[phase_index].children
+        if not sections:
+            # still walked once for the phase level entries it creates
+            segments.append((phase_index, ()))
+            continue
+        for section_index in sections:
+            segments.append((phase_index, (section_index,)))
+    return segments
+
+
+def update_walk(result: WalkResult, changed_keys: Iterable[str]) -> WalkResult:
+    """
+    Refreshes a WalkResult after some answers changed.
+
+    Only the segments holding a changed answer or a node whose dependencies
+    read one (see FormPlan.nodes_reading) are walked again. Their new outputs
+    are compared with the old ones and only the entries that differ are merged
+    again, at whatever depth they sit: a changed field answer re-merges that
+    field's entries, not its phase. A dict level whose keys appeared or moved
+    in a segment is put back in walk order, at the cost of one pass over that
+    level's keys in every segment. The output dicts are patched in place.
+
+    Args:
+        result: A result from walk_incremental.
+        changed_keys: Answer contexts that were set, changed or removed in
+            result.answers since the last walk or update.
+
+    Returns:
+        The same, updated, WalkResult.
+    """
+    plan = result.plan
+    changed_keys = list(changed_keys)
+    was_empty = not result.store
+    result.store.sync(changed_keys, result.answers)
+
+    if was_empty != (not result.store):
+        # every dependency fails on empty answers, so everything may change
+        affected = set(range(len(result.segments)))
+    else:
+        affected = _affected_segments(result, changed_keys)
+    if not affected:
+        return result
+
+    touched: List[Touched] = [{} for _ in range(5)]
+    dep_cache: Dict[Tuple, Dict[str, Any]] = {}
+    for segment in sorted(affected):
+        phase_index, sections = result.segments[segment]
+        old = result.segment_outputs[segment]
+        new = walk_compiled_segment(
+            plan,
+            result.store,
+            result.answersWRTMetadata,
+            phase_index,
+            sections,
+            dep_cache,
+        )
+        result.segment_outputs[segment] = new
+        for position in range(5):
+            _add_touched(touched[position], _diff(old[position], new[position]))
+
+    for position in range(5):
+        if touched[position]:
+            _patch(result, position, touched[position])
+    return result
+
+
+def _affected_segments(result: WalkResult, changed_keys: List[str]) -> Set[int]:
+    plan = result.plan
+    by_phase: Dict[int, List[int]] = {}
+    by_section: Dict[int, int] = {}
+    for segment, (phase_index, sections) in enumerate(result.segments):
+        by_phase.setdefault(phase_index, []).append(segment)
+        for section_index in sections:
+            by_section[section_index] = segment
+
+    def segments_of(index: int) -> List[int]:
+        chain = [index]
+        while plan.nodes[chain[-1]].parent >= 0:
+            chain.append(plan.nodes[chain[-1]].parent)
+        if len(chain) == 1:
+            # a top-level phase decides for all of its sections
+            return by_phase.get(index, [])
+        segment = by_section.get(chain[-2])
+        return [] if segment is None else [segment]
+
+    affected: Set[int] = set()
+    for key in changed_keys:
+        # the segment whose fields (or subform entries) hold the answer
+        parts = key.split(form_context_split_str, 3)
+        if len(parts) >= 3:
+            section = plan.by_key.get(form_context_split_str.join(parts[:3]))
+            if section is not None and section in by_section:
+                affected.add(by_section[section])
+        for index in plan.nodes_reading(key):
+            affected.update(segments_of(index))
+    return affected
+
+
+def _rebuild(result: WalkResult, position: int) -> None:
+    output = result.outputs[position]
+    output.clear()
+    for outputs in result.segment_outputs:
+        merge_output(output, outputs[position], position)
+
+
+def _diff(old: Dict[str, Any], new: Dict[str, Any]) -> Touched:
+    # the entries that differ between two outputs of one segment
+    touched: Touched = {}
+    stack: List[Tuple[Dict[str, Any], Dict[str, Any], Touched]] = [
+        (old, new, touched)
+    ]
+    while stack:
+        old, new, level = stack.pop()
+        added = [key for key in new if key not in old]
+        if added or [k for k in old if k in new] != [k for k in new if k in old]:
+            level[_REORDER] = True
+        for key in (*old, *added):
+            before = old.get(key, _MISSING)
+            after = new.get(key, _MISSING)
+            if isinstance(before, dict) and isinstance(after, dict):
+                level[key] = {}
+                stack.append((before, after, level[key]))
+            elif before is _MISSING or after is _MISSING or before != after:
+                level[key] = True
+    _prune(touched)
+    return touched
+
+
+def _prune(touched: Touched) -> None:
+    # drops the dict entries _diff found no difference below
+    stack: List[Tuple[Touched, bool]] = [(touched, False)]
+    while stack:
+        level, visited = stack.pop()
+        if not visited:
+            stack.append((level, True))
+            stack.extend(
+                (below, False) for below in level.values() if below is not True
+            )
+            continue
+        for key in [key for key, below in level.items() if below == {}]:
+            del level[key]
+
+
+def _add_touched(dst: Touched, src: Touched) -> None:
+    stack = [(dst, src)]
+    while stack:
+        dst, src = stack.pop()
+        for key, below in src.items():
+            current = dst.get(key)
+            if current is None or below is True:
+                dst[key] = below
+            elif current is not True:
+                stack.append((current, below))
+
+
+def _patch(result: WalkResult, position: int, touched: Touched) -> None:
+    # (output level, the segment output dicts at the same path in walk order,
+    # what changed at that level)
+    stack: List[Tuple[Dict[str, Any], List[Dict[str, Any]], Touched]] = [
+        (
+            result.outputs[position],
+            [outputs[position] for outputs in result.segment_outputs],
+            touched,
+        )
+    ]
+    while stack:
+        output, sources, level = stack.pop()
+        for key, below in level.items():
+            if key is _REORDER:
+                continue
+            values = [source[key] for source in sources if key in source]
+            current = output.get(key, _MISSING)
+            if (
+                below is not True
+                and isinstance(current, dict)
+                and values
+                and all(isinstance(value, dict) for value in values)
+            ):
+                stack.append((current, values, below))
+                continue
+
+            merged: Dict[str, Any] = {}
+            for value in values:
+                merge_output(merged, {key: value}, position)
+            if key in merged:
+                output[key] = merged[key]
+            else:
+                output.pop(key, None)
+
+        if _REORDER in level:
+            # new entries went to the end, restore walk order
+            order = dict.fromkeys(key for source in sources for key in source)
+            if list(output) != list(order):
+                entries = {key: output[key] for key in order}
+                output.clear()
+                output.update(entries)
+
+
+def merge_output(dst: Dict[str, Any], src: Dict[str, Any], position: int) -> None:
+    """
+    Merges one segment output into the accumulated output the way a single walk
+    writes them: dicts merge, answer lists extend, possible answers keep the
+    first list written and constructed answers are assigned.
+    """
+    if position == _CONSTRUCTED:
+        dst.update(src)
+        return
+    keep_lists = position == _POSSIBLE
+    stack = [(dst, src)]
+    while stack:
+        dst, src = stack.pop()
+        for key, value in src.items():
+            if key not in dst:
+                dst[key] = _copy(value)
+                continue
+            current = dst[key]
+            if isinstance(current, dict) and isinstance(value, dict):
+                stack.append((current, value))
+            elif isinstance(current, list) and isinstance(value, list):
+                if not keep_lists:
+                    current.extend(value)
+            else:
+                dst[key] = _copy(value)
+
+
+def _copy(value: Any) -> Any:
+    # containers are copied so merging never writes into a segment's outputs
+    if isinstance(value, list):
+        return list(value)
+    if not isinstance(value, dict):
+        return value
+    copy: Dict[str, Any] = {}
+    stack = [(copy, value)]
+    while stack:
+        dst, src = stack.pop()
+        for k, v in src.items():
+            if isinstance(v, dict):
+                dst[k] = {}
+                stack.append((dst[k], v))
+            else:
+                dst[k] = list(v) if isinstance(v, list) else v
+    return copy
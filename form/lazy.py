@@ -0,0 +1,300 @@
+from collections import OrderedDict
+from collections.abc import Mapping
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from .answer import AnswerStore
+from .compiled import walk_compiled_segment
+from .constant import form_context_split_str, form_output_names
+from .incremental import merge_output, plan_segments
+from .plan import FormPlan, PlanNode, compile_form
+
+# positions of the outputs in form_output_names
+_METADATA, _NESTED, _FLAT, _POSSIBLE, _CONSTRUCTED = range(5)
+
+_MISSING = object()
+
+
+class LazyView(Mapping):
+    """
+    One output of walk_lazy, computed on access.
+
+    Reading a key walks only the segments that can write it, merges their
+    entries for that key and memoizes the result; iterating or measuring the
+    view walks every segment once and materializes the whole output. Values
+    are shared with the memo, treat them as read-only.
+    """
+
+    __slots__ = ("_walk", "_position", "_values", "_full")
+
+    def __init__(self, walk: "LazyWalkResult", position: int) -> None:
+        self._walk = walk
+        self._position = position
+        # key → merged value, or _MISSING if no segment wrote it
+        self._values: Dict[str, Any] = {}
+        self._full: Optional[Dict[str, Any]] = None
+
+    def _get(self, key: str) -> Any:
+        if self._full is not None:
+            return self._full.get(key, _MISSING)
+        if key not in self._values:
+            merged: Dict[str, Any] = {}
+            for outputs in self._walk._outputs_of(self._position, key):
+                if key in outputs[self._position]:
+                    merge_output(
+                        merged,
+                        {key: outputs[self._position][key]},
+                        self._position,
+                    )
+            self._values[key] = merged.get(key, _MISSING)
+        return self._values[key]
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._get(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._get(key) is not _MISSING
+
+    def materialize(self) -> Dict[str, Any]:
+        """
+        Returns the whole output as the dict walk_compiled builds.
+        """
+        if self._full is None:
+            full: Dict[str, Any] = {}
+            for outputs in self._walk._all_outputs():
+                merge_output(full, outputs[self._position], self._position)
+            # keep the values already handed out
+            for key, value in self._values.items():
+                if value is not _MISSING:
+                    full[key] = value
+            self._full = full
+        return self._full
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.materialize())
+
+    def __len__(self) -> int:
+        return len(self.materialize())
+
+    def __repr__(self) -> str:
+        return f"LazyView({form_output_names[self._position]!r})"
+
+
+class LazyWalkResult:
+    """
+    Outputs of walk_lazy. Unpacks like the walk_form tuple:
+
+        metadata, nested, flat, possible, constructed = walk_lazy(...)
+
+    The form is walked in the segments of walk_incremental, each segment at
+    most once and only when a read needs it. Which segments can write a
+    top-level key is indexed once per plan: by phase id for nested and
+    possible, by the metadata ids a segment can write at the top level for
+    metadata, by field id for flat and by context prefix for constructed.
+    """
+
+    __slots__ = (
+        "plan",
+        "store",
+        "answersWRTMetadata",
+        "segments",
+        "segment_outputs",
+        "dep_cache",
+        "views",
+        "_index",
+    )
+
+    def __init__(
+        self,
+        plan: FormPlan,
+        answers: Union[Dict[str, List[Any]], AnswerStore],
+        answersWRTMetadata: Optional[dict],
+    ) -> None:
+        self.plan = plan
+        self.store = (
+            answers if isinstance(answers, AnswerStore) else AnswerStore(answers)
+        )
+        self.answersWRTMetadata = answersWRTMetadata
+        self._index = _segment_index(plan)
+        self.segments = self._index.segments
+        self.segment_outputs: List[Optional[Tuple[Dict[str, Any], ...]]] = [
+            None
+        ] * len(self.segments)
+        self.dep_cache: Dict[Tuple, Dict[str, Any]] = {}
+        self.views = tuple(LazyView(self, position) for position in range(5))
+
+    def _segment(self, segment: int) -> Tuple[Dict[str, Any], ...]:
+        outputs = self.segment_outputs[segment]
+        if outputs is None:
+            phase_index, sections = self.segments[segment]
+            outputs = walk_compiled_segment(
+                self.plan,
+                self.store,
+                self.answersWRTMetadata,
+                phase_index,
+                sections,
+                self.dep_cache,
+            )
+            self.segment_outputs[segment] = outputs
+        return outputs
+
+    def _outputs_of(self, position: int, key: str) -> Iterator[Tuple[Dict, ...]]:
+        # outputs of the segments that can write key, in walk order
+        for segment in self._index.writers(position, key):
+            yield self._segment(segment)
+
+    def _all_outputs(self) -> Iterator[Tuple[Dict, ...]]:
+        for segment in range(len(self.segments)):
+            yield self._segment(segment)
+
+    def __iter__(self) -> Iterator[LazyView]:
+        return iter(self.views)
+
+    @property
+    def metadata(self) -> LazyView:
+        return self.views[_METADATA]
+
+    @property
+    def nested(self) -> LazyView:
+        return self.views[_NESTED]
+
+    @property
+    def flat(self) -> LazyView:
+        return self.views[_FLAT]
+
+    @property
+    def possible(self) -> LazyView:
+        return self.views[_POSSIBLE]
+
+    @property
+    def constructed(self) -> LazyView:
+        return self.views[_CONSTRUCTED]
+
+
+class _SegmentIndex:
+    """
+    The walk segments of a plan and, per output, the segments that can write
+    each top-level key.
+    """
+
+    __slots__ = ("segments", "keys", "prefixes")
+
+    def __init__(self, plan: FormPlan) -> None:
+        self.segments = plan_segments(plan)
+        # output position → top-level key → segments, in walk order
+        self.keys: Tuple[Dict[str, List[int]], ...] = tuple({} for _ in range(5))
+        # constructed keys are contexts: (segment context prefix, segment)
+        self.prefixes: List[Tuple[str, int]] = []
+
+        nodes = plan.nodes
+        form_prefix = plan.form_id + form_context_split_str
+        for segment, (phase_index, sections) in enumerate(self.segments):
+            phase = nodes[phase_index]
+            for position in (_NESTED, _POSSIBLE):
+                self._add(position, phase.id, segment)
+
+            metadata_ids: Set[str] = set()
+            field_ids: Set[str] = set()
+            if phase.metadata_id:
+                metadata_ids.add(phase.metadata_id)
+            for section_index in sections:
+                section = nodes[section_index]
+                self.prefixes.append(
+                    (
+                        f"{form_prefix}{phase.id}{form_context_split_str}"
+                        f"{section.id}{form_context_split_str}",
+                        segment,
+                    )
+                )
+                _collect_keys(
+                    nodes, section, not phase.metadata_id, metadata_ids, field_ids
+                )
+            for key in metadata_ids:
+                self._add(_METADATA, key, segment)
+            for key in field_ids:
+                self._add(_FLAT, key, segment)
+
+    def _add(self, position: int, key: str, segment: int) -> None:
+        segments = self.keys[position].setdefault(key, [])
+        if not segments or segments[-1] != segment:
+            segments.append(segment)
+
+    def writers(self, position: int, key: str) -> List[int]:
+        if position == _CONSTRUCTED:
+            return [s for prefix, s in self.prefixes if key.startswith(prefix)]
+        return self.keys[position].get(key, [])
+
+
+# plan object id → (plan, index); holding the plan keeps its id unique
+_segment_indexes: "OrderedDict[int, Tuple[FormPlan, _SegmentIndex]]" = OrderedDict()
+_segment_indexes_lock = Lock()
+_segment_indexes_maxsize = 64
+
+
+def _segment_index(plan: FormPlan) -> _SegmentIndex:
+    with _segment_indexes_lock:
+        entry = _segment_indexes.get(id(plan))
+        if entry is not None and entry[0] is plan:
+            _segment_indexes.move_to_end(id(plan))
+            return entry[1]
+
+    index = _SegmentIndex(plan)
+    with _segment_indexes_lock:
+        _segment_indexes[id(plan)] = (plan, index)
+        _segment_indexes.move_to_end(id(plan))
+        while len(_segment_indexes) > _segment_indexes_maxsize:
+            _segment_indexes.popitem(last=False)
+    return index
+
+
+def _collect_keys(
+    nodes: Tuple[PlanNode, ...],
+    section: PlanNode,
+    top_level_metadata: bool,
+    metadata_ids: Set[str],
+    field_ids: Set[str],
+) -> None:
+    """
+    Adds the top-level metadata keys (when the phase has no metadata id, those
+    met on each path down before a section or subform nests them) and the
+    field ids found below a section.
+    Subform entries are included, which can only over-approximate.
+    """
+    # (node, whether no metadata id was passed on the way down)
+    stack: List[Tuple[PlanNode, bool]] = [(section, top_level_metadata)]
+    while stack:
+        node, top_level = stack.pop()
+        if node.kind == "field":
+            field_ids.add(node.id)
+        if top_level and node.metadata_id:
+            metadata_ids.add(node.metadata_id)
+            # fields write their answers under their metadata id, but their
+            # trigger sections write beside them
+            top_level = node.kind == "field" and node.type != "subformwtable"
+        below = [
+            *(node.children or ()),
+            *node.triggers,
+            *(index for _, triggers in node.options for index in triggers),
+        ]
+        stack.extend((nodes[index], top_level) for index in below)
+
+
+def walk_lazy(
+    form: Union[dict, FormPlan],
+    answers: Union[Dict[str, List[Any]], AnswerStore],
+    answersWRTMetadata: Optional[dict],
+) -> LazyWalkResult:
+    """
+    Walks a form on demand.
+
+    Returns mapping views in place of the five walk_form dicts. A top-level
+    entry, one phase of nested or one metadata id of metadata, costs a walk of
+    the sections that can write it, on first access; the views hold the same
+    entries as walk_compiled's outputs. answers must not change while the
+    result is in use.
+    """
+    plan = form if isinstance(form, FormPlan) else compile_form(form)
+    return LazyWalkResult(plan, answers, answersWRTMetadata)
@@ -0,0 +1,80 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from .stats import current_stats
+
+_MISSING = object()
+
+
+class MetadataIndex:
+    """
+    Path → value index of an answersWRTMetadata object.
+
+    Every path of nested dicts is flattened up front, so resolving a metadata
+    context is one dict lookup. Contexts that are not a path of the object
+    resolve like the walkers' nest walk did: ids missing at their level are
+    skipped, not failed. Those are resolved from their parent context once
+    and then indexed too.
+    """
+
+    __slots__ = ("root", "_values")
+
+    def __init__(self, root: dict) -> None:
+        self.root = root
+        self._values: Dict[Tuple[Any, ...], Any] = {(): root}
+        stack: List[Tuple[Tuple[Any, ...], dict]] = (
+            [((), root)] if isinstance(root, dict) else []
+        )
+        while stack:
+            path, nest = stack.pop()
+            for key, value in nest.items():
+                self._values[path + (key,)] = value
+                if isinstance(value, dict):
+                    stack.append((path + (key,), value))
+
+    def resolve(self, metadata_context: Tuple[str, ...]) -> Any:
+        """
+        Returns the value the nest walk along metadata_context ends at, the
+        root when none of its ids is found.
+        """
+        value = self._values.get(metadata_context, _MISSING)
+        if value is _MISSING:
+            nest = self.resolve(metadata_context[:-1])
+            m_id = metadata_context[-1]
+            value = nest[m_id] if m_id in nest else nest
+            self._values[metadata_context] = value
+        return value
+
+
+# answersWRTMetadata object id → (object, index); holding the object keeps its
+# id unique
+_indexes: "OrderedDict[int, Tuple[dict, MetadataIndex]]" = OrderedDict()
+_indexes_lock = Lock()
+_indexes_maxsize = 16
+
+
+def metadata_index(answersWRTMetadata: dict) -> MetadataIndex:
+    """
+    Returns the MetadataIndex of answersWRTMetadata, reused for as long as the
+    same object is passed again, so the object must not be changed in between.
+    """
+    index: Optional[MetadataIndex] = None
+    with _indexes_lock:
+        entry = _indexes.get(id(answersWRTMetadata))
+        if entry is not None and entry[0] is answersWRTMetadata:
+            index = entry[1]
+            _indexes.move_to_end(id(answersWRTMetadata))
+    stats = current_stats.get()
+    if stats is not None:
+        stats.cache_lookup("metadata_index", index is not None)
+    if index is not None:
+        return index
+
+    index = MetadataIndex(answersWRTMetadata)
+    with _indexes_lock:
+        _indexes[id(answersWRTMetadata)] = (answersWRTMetadata, index)
+        _indexes.move_to_end(id(answersWRTMetadata))
+        while len(_indexes) > _indexes_maxsize:
+            _indexes.popitem(last=False)
+    return index
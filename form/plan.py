@@ -0,0 +1,565 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from .answer import AnswerMultiset, answer_multisets
+from .constant import form_context_split_str
+from .defs import FormDefCursor, form_def_step, get_form_def
+
+CHOICE_FIELD_TYPES = (
+    "radio",
+    "dropdown-single-select",
+    "checkbox",
+    "dropdown-multi-select",
+)
+TEXT_FIELD_TYPES = ("text", "textarea", "number", "password")
+# field types whose options can be chosen by an "options" dependency
+OPTION_SOURCE_TYPES = (
+    "checkbox",
+    "radio",
+    "dropdown-multi-select",
+    "dropdown-single-select",
+)
+
+
+@dataclass(frozen=True, eq=False)
+class OptionIndex:
+    """
+    Options of a field indexed by value.
+
+    Finding the options an answer selects costs one lookup per selected value
+    instead of a pass over every option, and triggered lists the only options
+    a walker has to visit for the unselected ones. Positions are indices into
+    the field's options list. Option values that cannot be hashed are compared
+    one by one, and only against answer values that cannot be hashed either.
+    """
+
+    # option value → positions of the options with that value
+    positions: Dict[Any, Tuple[int, ...]]
+    # (position, value) of options whose value cannot be hashed
+    unhashable: Tuple[Tuple[int, Any], ...]
+    # positions of the options that have triggers
+    triggered: Tuple[int, ...]
+    # every option is a dict with a "value", as an options dependency expects
+    complete: bool
+
+    def matching(self, values: Iterable[Any], unique: bool = False) -> List[int]:
+        """
+        Returns the positions of the options whose value equals one of values,
+        in option order. Unless unique, an option is repeated once per equal
+        value, as the walkers' option × value loop did.
+        """
+        found: List[int] = []
+        for value in values:
+            try:
+                found.extend(self.positions.get(value, ()))
+            except TypeError:
+                found.extend(i for i, v in self.unhashable if v == value)
+        if unique:
+            return sorted(set(found))
+        found.sort()
+        return found
+
+
+def build_option_index(options: Sequence[Any]) -> OptionIndex:
+    """
+    Indexes a field's options list, see OptionIndex.
+    """
+    positions: Dict[Any, List[int]] = {}
+    unhashable: List[Tuple[int, Any]] = []
+    triggered: List[int] = []
+    complete = True
+    for i, opt in enumerate(options):
+        if not isinstance(opt, dict):
+            complete = False
+            continue
+        if "value" not in opt:
+            complete = False
+        value = opt.get("value")
+        try:
+            positions.setdefault(value, []).append(i)
+        except TypeError:
+            unhashable.append((i, value))
+        if opt.get("triggers"):
+            triggered.append(i)
+    return OptionIndex(
+        positions={value: tuple(found) for value, found in positions.items()},
+        unhashable=tuple(unhashable),
+        triggered=tuple(triggered),
+        complete=complete,
+    )
+
+
+@dataclass(frozen=True)
+class DependencyRef:
+    """
+    A dependency path (or a prefix of one) with its context key precomputed.
+
+    key is the context without "*" resolution (the "woIdx" form of
+    resolve_context_path); wildcards tells the walker whether the key has to be
+    resolved against the current context at all. node is the plan index of the
+    definition get_form_def returns for key, or -1.
+    """
+
+    path: Tuple[str, ...]
+    key: str
+    wildcards: bool
+    node: int
+
+
+@dataclass(frozen=True)
+class CompiledDependency:
+    type: Optional[str]
+    target: DependencyRef
+    parents: Tuple[DependencyRef, ...]
+    answers: Tuple[List[Any], ...]
+    # answers precompiled by answer_multisets, None if they could not be
+    answer_sets: Optional[FrozenSet[AnswerMultiset]]
+    exclude: Tuple[DependencyRef, ...]
+    # options of the target when the target can drive an "options" dependency
+    target_options: Optional[Tuple[dict, ...]]
+    target_option_index: Optional[OptionIndex]
+
+
+@dataclass(frozen=True)
+class PlanNode:
+    index: int
+    kind: str  # "phase", "section" or "field"
+    id: str
+    parent: int  # -1 for top-level phases
+    path: Tuple[str, ...]  # ids below the form, "*" for subform entries
+    key: str  # form id + path, as used by get_form_def
+    suffix: str  # appended to the parent context by the walkers
+    type: Optional[str]
+    metadata_id: Optional[str]
+    required: bool
+    # True if this node or anything walked below it has a metadata id
+    metadata_below: bool
+    dependencies: Tuple[CompiledDependency, ...]
+    # phases → sections, sections → fields, subformwtable fields → phases;
+    # None when the definition does not hold a list there
+    children: Optional[Tuple[int, ...]]
+    # fields only: field-level triggers and (option value, option triggers)
+    triggers: Tuple[int, ...]
+    options: Tuple[Tuple[Any, Tuple[int, ...]], ...]
+    # fields only: options by value, positions index into options
+    option_index: Optional[OptionIndex]
+
+
+@dataclass(frozen=True)
+class FormPlan:
+    """
+    Immutable, indexed representation of a form definition.
+
+    Built once by compile_form and walked any number of times by
+    walk_compiled without going back to the raw form JSON.
+    """
+
+    form_id: str
+    phases: Tuple[int, ...]
+    nodes: Tuple[PlanNode, ...]
+    by_key: Mapping[str, int]
+    # reverse dependency index: answer context → nodes whose dependency data
+    # reads it, directly or through the visibility of a dependency's parents
+    dependents: Mapping[str, Tuple[int, ...]]
+    # the same for contexts with "*" wildcards, as split context segments
+    wildcard_dependents: Tuple[Tuple[Tuple[str, ...], Tuple[int, ...]], ...]
+    # form id + path of every subformwtable field, for AnswerStore.entries
+    subform_paths: FrozenSet[Tuple[str, ...]]
+
+    def __reduce__(self):
+        # mapping proxies do not pickle, plans are shipped to worker processes
+        return (
+            _restore_plan,
+            (
+                self.form_id,
+                self.phases,
+                self.nodes,
+                dict(self.by_key),
+                dict(self.dependents),
+                self.wildcard_dependents,
+                self.subform_paths,
+            ),
+        )
+
+    def get_node(self, key: str) -> Optional[PlanNode]:
+        """
+        Returns the node registered under a context key (subform entries as "*").
+        """
+        index = self.by_key.get(key)
+        return None if index is None else self.nodes[index]
+
+    def nodes_reading(self, context: str) -> Set[int]:
+        """
+        Returns the indices of the nodes whose dependency data reads the answer
+        at context. "*" in dependency paths matches any segment, the way
+        resolve_context_path fills it in from the reading node's context.
+        """
+        result = set(self.dependents.get(context, ()))
+        if self.wildcard_dependents:
+            parts = context.split(form_context_split_str)
+            for pattern, indices in self.wildcard_dependents:
+                if len(pattern) == len(parts) and all(
+                    p == "*" or p == c for p, c in zip(pattern, parts)
+                ):
+                    result.update(indices)
+        return result
+
+    def parents(self, node: PlanNode) -> List[PlanNode]:
+        """
+        Returns the ancestors of a node, closest first.
+        """
+        result: List[PlanNode] = []
+        while node.parent >= 0:
+            node = self.nodes[node.parent]
+            result.append(node)
+        return result
+
+
+def _restore_plan(
+    form_id: str,
+    phases: Tuple[int, ...],
+    nodes: Tuple[PlanNode, ...],
+    by_key: Dict[str, int],
+    dependents: Dict[str, Tuple[int, ...]],
+    wildcard_dependents: Tuple[Tuple[Tuple[str, ...], Tuple[int, ...]], ...],
+    subform_paths: FrozenSet[Tuple[str, ...]],
+) -> FormPlan:
+    return FormPlan(
+        form_id=form_id,
+        phases=phases,
+        nodes=nodes,
+        by_key=MappingProxyType(by_key),
+        dependents=MappingProxyType(dependents),
+        wildcard_dependents=wildcard_dependents,
+        subform_paths=subform_paths,
+    )
+
+
+# a node compile_form still has to add: kind, definition, parent index, parent
+# path, the parent's list its index goes to, and the warning to print instead
+# when the definition is not a dict
+_PendingNode = Tuple[str, Any, int, Tuple[str, ...], List[int], Optional[str]]
+
+
+# a dependency path prefix resolved by compile_form: its ref, definition, the
+# get_form_def cursor it ended at and the entries one segment longer
+_PrefixEntry = Tuple[
+    DependencyRef, Optional[dict], Optional[FormDefCursor], Dict[str, Any]
+]
+
+
+def compile_form(form: dict) -> FormPlan:
+    """
+    Compiles a form definition into a FormPlan.
+
+    Args:
+        form: The raw form definition.
+
+    Returns:
+        A FormPlan holding one node per phase, section, trigger section and
+        field, with dependency paths and get_form_def lookups resolved up front.
+    """
+    form_id = form.get("id", "<no-id>")
+    prefix = f"{form_id}{form_context_split_str}"
+
+    # mutable node records, frozen once every dependency target is known
+    records: List[Dict[str, Any]] = []
+    index_by_def: Dict[int, int] = {}
+    by_key: Dict[str, int] = {}
+
+    def add_node(
+        kind: str, node: dict, parent: int, parent_path: Tuple[str, ...]
+    ) -> Dict[str, Any]:
+        node_id = node.get("id", "<no-id>")
+        path = parent_path + (node_id,)
+        record = {
+            "index": len(records),
+            "kind": kind,
+            "id": node_id,
+            "parent": parent,
+            "path": path,
+            "key": prefix + form_context_split_str.join(path),
+            "suffix": f"{form_context_split_str}{node_id}",
+            "type": node.get("type"),
+            "metadata_id": node.get("metadata", {}).get("id"),
+            "required": bool(node.get("required")),
+            "dependency": node.get("dependency") or [],
+            "children": None,
+            "triggers": (),
+            "options": (),
+            "option_index": None,
+        }
+        records.append(record)
+        index_by_def[id(node)] = record["index"]
+        by_key.setdefault(record["key"], record["index"])
+        return record
+
+    # children are pushed reversed, so nodes are numbered depth first in
+    # definition order, parents before their children
+    stack: List[_PendingNode] = []
+
+    phases: List[int] = []
+    invalid_phase = f"skipping invalid phase in form {form_id}"
+    for phase in reversed(form.get("phases", [])):
+        stack.append(("phase", phase, -1, (), phases, invalid_phase))
+
+    while stack:
+        kind, node, parent, path, siblings, warning = stack.pop()
+        if warning is not None and not isinstance(node, dict):
+            print(f"⚠️ {warning}")
+            continue
+        record = add_node(kind, node, parent, path)
+        index = record["index"]
+        siblings.append(index)
+        children: List[_PendingNode] = []
+
+        if kind == "phase":
+            sections = node.get("sections", [])
+            if not isinstance(sections, list):
+                print(f"⚠️ sections missing or not a list in phase {record['id']}")
+                continue
+            record["children"] = []
+            for section in sections:
+                children.append(
+                    (
+                        "section",
+                        section,
+                        index,
+                        record["path"],
+                        record["children"],
+                        f"skipping invalid section in phase {record['id']}",
+                    )
+                )
+
+        elif kind == "section":
+            fields = node.get("fields", [])
+            if not isinstance(fields, list):
+                print(
+                    f"⚠️ section.fields missing or not a list in section {record['id']}"
+                )
+                continue
+            record["children"] = []
+            for field in fields:
+                children.append(
+                    (
+                        "field",
+                        field,
+                        index,
+                        record["path"],
+                        record["children"],
+                        f"skipping invalid field in section {record['id']}",
+                    )
+                )
+
+        else:
+            # triggered sections hang off the enclosing section's context
+            record["options"] = []
+            for opt in node.get("options", []):
+                triggers: List[int] = []
+                record["options"].append((opt.get("value"), triggers))
+                for trig in opt.get("triggers", []):
+                    children.append(("section", trig, index, path, triggers, None))
+            record["option_index"] = build_option_index(node.get("options", []))
+            record["triggers"] = []
+            for trig in node.get("triggers", []):
+                children.append(
+                    ("section", trig, index, path, record["triggers"], None)
+                )
+
+            if record["type"] == "subformwtable" and "phases" in node:
+                entry_path = record["path"] + ("*",)
+                record["children"] = []
+                for phase in node["phases"]:
+                    children.append(
+                        ("phase", phase, index, entry_path, record["children"], None)
+                    )
+
+        stack.extend(reversed(children))
+
+    # Every dependency also refers to each prefix of its path, and dependencies
+    # share those prefixes, so each prefix is looked up once in a trie, going on
+    # from the get_form_def cursor its parent prefix ended at.
+    def entry_for(parent: _PrefixEntry, segment: str, key: str) -> _PrefixEntry:
+        cursor, definition = parent[2], None
+        for part in segment.split(form_context_split_str):
+            if cursor is None:
+                definition = None
+                break
+            cursor, definition = form_def_step(cursor, part)
+        dep_ref = DependencyRef(
+            path=parent[0].path + (segment,),
+            key=key,
+            wildcards=parent[0].wildcards or segment == "*",
+            node=-1 if definition is None else index_by_def.get(id(definition), -1),
+        )
+        return dep_ref, definition, cursor, {}
+
+    # the form id takes the first context segment; the lookup walks any others
+    root_cursor: Optional[FormDefCursor] = (form, None, None, None)
+    for part in prefix.split(form_context_split_str)[1:-1]:
+        if root_cursor is not None:
+            root_cursor = form_def_step(root_cursor, part)[0]
+    root_def = get_form_def(prefix, form, use_cache=False)
+    root: _PrefixEntry = (
+        DependencyRef(
+            path=(),
+            key=prefix,
+            wildcards=False,
+            node=-1 if root_def is None else index_by_def.get(id(root_def), -1),
+        ),
+        root_def,
+        root_cursor,
+        {},
+    )
+
+    def resolve(path: List[str]) -> List[_PrefixEntry]:
+        """Trie entries of path[:1], path[:2], ... path."""
+        entries = []
+        entry = root
+        for segment in path:
+            child = entry[3].get(segment)
+            if child is None:
+                key = entry[0].key + segment
+                if entry is not root:
+                    key = entry[0].key + form_context_split_str + segment
+                child = entry[3][segment] = entry_for(entry, segment, key)
+            entries.append(child)
+            entry = child
+        return entries
+
+    def ref(path: List[str]) -> DependencyRef:
+        entries = resolve(path)
+        return (entries[-1] if entries else root)[0]
+
+    def compile_dependency(dep: dict) -> CompiledDependency:
+        entries = resolve(dep["path"])
+        target, target_def = (entries[-1] if entries else root)[:2]
+        target_options = None
+        target_option_index = None
+        if target_def and target_def.get("type") in OPTION_SOURCE_TYPES:
+            target_options = tuple(target_def.get("options", []))
+            target_option_index = build_option_index(target_options)
+        return CompiledDependency(
+            type=dep.get("type"),
+            target=target,
+            parents=tuple(entry[0] for entry in entries[:-1]),
+            answers=tuple(dep.get("answers") or ()),
+            answer_sets=answer_multisets(dep.get("answers") or ()),
+            exclude=tuple(ref(path) for path in dep.get("exclude", [])),
+            target_options=target_options,
+            target_option_index=target_option_index,
+        )
+
+    # children always come after their parent, so one reverse pass suffices
+    for r in reversed(records):
+        below = [
+            *(r["children"] or ()),
+            *r["triggers"],
+            *(index for _, triggers in r["options"] for index in triggers),
+        ]
+        r["metadata_below"] = bool(r["metadata_id"]) or any(
+            records[index]["metadata_below"] for index in below
+        )
+
+    nodes = tuple(
+        PlanNode(
+            index=r["index"],
+            kind=r["kind"],
+            id=r["id"],
+            parent=r["parent"],
+            path=r["path"],
+            key=r["key"],
+            suffix=r["suffix"],
+            type=r["type"],
+            metadata_id=r["metadata_id"],
+            required=r["required"],
+            metadata_below=r["metadata_below"],
+            dependencies=tuple(compile_dependency(dep) for dep in r["dependency"]),
+            children=None if r["children"] is None else tuple(r["children"]),
+            triggers=tuple(r["triggers"]),
+            options=tuple(
+                (value, tuple(triggers)) for value, triggers in r["options"]
+            ),
+            option_index=r["option_index"],
+        )
+        for r in records
+    )
+
+    dependents, wildcard_dependents = _index_dependents(nodes)
+
+    return FormPlan(
+        form_id=form_id,
+        phases=tuple(phases),
+        nodes=nodes,
+        by_key=MappingProxyType(by_key),
+        dependents=MappingProxyType(dependents),
+        wildcard_dependents=wildcard_dependents,
+        subform_paths=frozenset(
+            (form_id,) + node.path
+            for node in nodes
+            if node.type == "subformwtable" and node.children is not None
+        ),
+    )
+
+
+def _index_dependents(
+    nodes: Tuple[PlanNode, ...],
+) -> Tuple[
+    Dict[str, Tuple[int, ...]], Tuple[Tuple[Tuple[str, ...], Tuple[int, ...]], ...]
+]:
+    reads: Dict[int, Set[str]] = {}
+
+    def keys_read(index: int) -> Iterator[int]:
+        """
+        Fills reads[index], first yielding each parent node whose keys it needs
+        and that is not filled yet; the caller fills those before resuming.
+        """
+        # guards against dependency cycles while the entry is being filled
+        reads[index] = result = set()
+        for dep in nodes[index].dependencies:
+            result.add(dep.target.key)
+            result.update(exclude.key for exclude in dep.exclude)
+            for parent in dep.parents:
+                if parent.node >= 0:
+                    if parent.node not in reads:
+                        yield parent.node
+                    result.update(reads[parent.node])
+
+    readers: Dict[str, List[int]] = {}
+    for node in nodes:
+        if node.index not in reads:
+            # an explicit stack in place of recursing into the parents
+            stack = [keys_read(node.index)]
+            while stack:
+                parent_index = next(stack[-1], None)
+                if parent_index is None:
+                    stack.pop()
+                else:
+                    stack.append(keys_read(parent_index))
+        for key in reads[node.index]:
+            readers.setdefault(key, []).append(node.index)
+
+    dependents = {
+        key: tuple(indices)
+        for key, indices in readers.items()
+        if "*" not in key.split(form_context_split_str)
+    }
+    wildcard_dependents = tuple(
+        (tuple(key.split(form_context_split_str)), tuple(indices))
+        for key, indices in readers.items()
+        if key not in dependents
+    )
+    return dependents, wildcard_dependents
@@ -0,0 +1,151 @@
+import dataclasses
+import gc
+import hashlib
+import mmap
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from .codec import JsonCodec, default_codec, load_path
+from .constant import form_context_split_str
+from .defs import form_fingerprint
+from .plan import (
+    CompiledDependency,
+    DependencyRef,
+    FormPlan,
+    OptionIndex,
+    PlanNode,
+    compile_form,
+)
+from .stats import current_stats
+
+# On-disk cache of compiled forms.
+#
+# A plan file is <key>.plan in the cache directory, key being the hex content
+# hash of the form: form_fingerprint for definitions already loaded, a hash of
+# the raw bytes for definition files, so a cached file is never parsed at all.
+# The file is a short header (magic, plan schema hash, key) followed by the
+# pickled FormPlan, and is read through a memory map. Files whose header does
+# not match, including ones written by code with different plan classes, are
+# recompiled and replaced. Plans are unpickled, so only point cache_dir at a
+# directory no one else can write to.
+
+_MAGIC = b"FBPLAN1\n"
+_KEY_SIZE = 16
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+def _schema_hash() -> bytes:
+    # changes whenever the plan classes or the context separator do
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(form_context_split_str.encode("utf-8"))
+    for cls in (FormPlan, PlanNode, CompiledDependency, DependencyRef, OptionIndex):
+        names = ",".join(field.name for field in dataclasses.fields(cls))
+        digest.update(f"{cls.__name__}({names})".encode("utf-8"))
+    return digest.digest()
+
+
+_SCHEMA = _schema_hash()
+_HEADER_SIZE = len(_MAGIC) + len(_SCHEMA) + _KEY_SIZE
+
+
+def default_cache_dir() -> Path:
+    """
+    Returns $FORMBUILDER_PLAN_CACHE, else formbuilder/plans in the user cache
+    directory ($XDG_CACHE_HOME or ~/.cache).
+    """
+    configured = os.environ.get("FORMBUILDER_PLAN_CACHE")
+    if configured:
+        return Path(configured)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "formbuilder" / "plans"
+
+
+def _read_plan(path: Path, key: bytes) -> Optional[FormPlan]:
+    try:
+        with open(path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapped:
+            if mapped[:_HEADER_SIZE] != _MAGIC + _SCHEMA + key:
+                return None
+            # a plan is many small objects that are never cyclic garbage;
+            # collecting while they are created triples the load time
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                with memoryview(mapped) as view:
+                    plan = pickle.loads(view[_HEADER_SIZE:])
+            finally:
+                if gc_enabled:
+                    gc.enable()
+    except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+        # missing, empty or truncated files
+        return None
+    return plan if isinstance(plan, FormPlan) else None
+
+
+def _write_plan(path: Path, key: bytes, plan: FormPlan) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # written aside and renamed, so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_MAGIC + _SCHEMA + key)
+                pickle.dump(plan, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError as e:
+        print(f"⚠️ could not write plan cache {path}: {e}")
+
+
+def _cached(
+    key: bytes, cache_dir: Optional[PathLike], compile_: Callable[[], FormPlan]
+) -> FormPlan:
+    path = Path(cache_dir or default_cache_dir()) / f"{key.hex()}.plan"
+    plan = _read_plan(path, key)
+    stats = current_stats.get()
+    if stats is not None:
+        stats.cache_lookup("plan_cache", plan is not None)
+    if plan is None:
+        plan = compile_()
+        _write_plan(path, key, plan)
+    return plan
+
+
+def cached_compile(form: dict, cache_dir: Optional[PathLike] = None) -> FormPlan:
+    """
+    compile_form through the on-disk cache, keyed by form_fingerprint.
+    """
+    key = bytes.fromhex(form_fingerprint(form, refresh=True))
+    return _cached(key, cache_dir, lambda: compile_form(form))
+
+
+def cached_compile_file(
+    form_path: PathLike,
+    cache_dir: Optional[PathLike] = None,
+    codec: JsonCodec = default_codec,
+) -> FormPlan:
+    """
+    Compiles the form definition in a JSON file through the on-disk cache,
+    keyed by a hash of the file's bytes. On a hit the file is hashed, through
+    a memory map, but not parsed.
+    """
+    digest = hashlib.blake2b(digest_size=_KEY_SIZE)
+    with open(form_path, "rb") as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        except ValueError:
+            # empty files cannot be mapped
+            digest.update(f.read())
+    return _cached(
+        digest.digest(),
+        cache_dir,
+        lambda: compile_form(load_path(form_path, codec)),
+    )
@@ -0,0 +1,122 @@
+import heapq
+from contextvars import ContextVar, Token
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Hook called after every walker step: (level, context, seconds)
+StatsHook = Callable[[str, str, float], None]
+
+
+class WalkStats:
+    """
+    Opt-in statistics of one or more walks.
+
+    Pass one to walk_form(stats=...) or activate it around any calls; while it
+    is active the walkers and lookups record into it. When no stats object is
+    active the hot paths only pay for one context variable read per call.
+
+    Records, by name:
+      calls / time: walk_form, form_dep_data, get_form_def,
+        get_subform_answers, subform_entries and the walker levels phase,
+        section, field and entry (subform entry merges).
+        Times are inclusive; nested calls of the same name are counted but
+        timed once, by the outermost call. Walker level times are the nodes'
+        own work, their children are timed separately.
+      cache: hits and misses of form_defs_cache (get_form_def),
+        required_field_cache, plan_cache and metadata_index.
+      node times: own time of every node, by context, for slowest_nodes.
+
+    One object is not safe to record into from several threads at once; give
+    each concurrent walk its own and merge the dicts if needed.
+    """
+
+    __slots__ = ("calls", "time", "cache", "node_time", "hook", "_depth")
+
+    def __init__(self, hook: Optional[StatsHook] = None) -> None:
+        self.calls: Dict[str, int] = {}
+        self.time: Dict[str, float] = {}
+        # name → [hits, misses]
+        self.cache: Dict[str, List[int]] = {}
+        self.node_time: Dict[str, float] = {}
+        self.hook = hook
+        self._depth: Dict[str, int] = {}
+
+    def activate(self) -> "Token[Optional[WalkStats]]":
+        """
+        Makes this the active stats object of the current thread or task,
+        until deactivate is called with the returned token.
+        """
+        return current_stats.set(self)
+
+    @staticmethod
+    def deactivate(token: "Token[Optional[WalkStats]]") -> None:
+        current_stats.reset(token)
+
+    def begin(self, name: str) -> Optional[float]:
+        """
+        Counts a call; returns its start time unless it is nested in another
+        call of the same name. Pass the result to end.
+        """
+        depth = self._depth.get(name, 0)
+        self._depth[name] = depth + 1
+        self.calls[name] = self.calls.get(name, 0) + 1
+        return perf_counter() if depth == 0 else None
+
+    def end(self, name: str, started: Optional[float]) -> None:
+        self._depth[name] -= 1
+        if started is not None:
+            self.time[name] = self.time.get(name, 0.0) + perf_counter() - started
+
+    def record_node(self, level: str, context: str, seconds: float) -> None:
+        """
+        Records the own time of one walker step.
+        """
+        self.calls[level] = self.calls.get(level, 0) + 1
+        self.time[level] = self.time.get(level, 0.0) + seconds
+        self.node_time[context] = self.node_time.get(context, 0.0) + seconds
+        if self.hook is not None:
+            self.hook(level, context, seconds)
+
+    def cache_lookup(self, name: str, hit: bool) -> None:
+        counts = self.cache.setdefault(name, [0, 0])
+        counts[0 if hit else 1] += 1
+
+    def hit_rate(self, name: str) -> Optional[float]:
+        """
+        Returns the hit rate of a cache, None if it was never consulted.
+        """
+        hits, misses = self.cache.get(name, (0, 0))
+        total = hits + misses
+        return hits / total if total else None
+
+    def slowest_nodes(self, n: int = 10) -> List[Tuple[str, float]]:
+        """
+        Returns the n contexts with the most own time, slowest first.
+        """
+        return heapq.nlargest(n, self.node_time.items(), key=lambda item: item[1])
+
+    def as_dict(self, slowest: int = 10) -> Dict[str, Any]:
+        """
+        Returns the statistics as plain, JSON serializable data.
+        """
+        return {
+            "calls": dict(self.calls),
+            "time": dict(self.time),
+            "cache": {
+                name: {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": self.hit_rate(name),
+                }
+                for name, (hits, misses) in self.cache.items()
+            },
+            "slowest_nodes": [
+                {"context": context, "time": seconds}
+                for context, seconds in self.slowest_nodes(slowest)
+            ],
+        }
+
+
+current_stats: ContextVar[Optional[WalkStats]] = ContextVar(
+    "current_stats", default=None
+)
@@ -1,42 +1,173 @@
 import sys
-import json
+import argparse
 from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional, Union
 
+from form.codec import JsonCodec, codecs, default_codec, dump_stream, load_path
 from form.form import walk_form
+from form.batch import walk_forms
+from form.plan import FormPlan
+from form.plancache import cached_compile_file, default_cache_dir
 
+OUTPUT_NAMES = ["metadata", "nested", "flat", "possible", "constructed"]
 
-def load_json(file_path: str):
-    """Load and return JSON from a file path."""
+answersWRTMetadata = {
+    "company_name": ["Bus Alpha"],
+    "vat_id": ["f90s78dofjk"],
+    "customer_number": ["lsdufo7s9dfu7"],
+    "gln": [12345],
+    "checkin_format": ["pdf"],
+    "checkin_channel": ["email"],
+    "responsible_person_at_bp": ["tester"],
+    "email_of_responsible_person_at_bp": ["tester@email.com"],
+}
+
+
+def load_json(file_path: str, codec: JsonCodec = default_codec):
+    """Load and return JSON from a file path, memory mapped."""
     path = Path(file_path)
     if not path.exists():
         raise FileNotFoundError(f"File not found: {file_path}")
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    return load_path(path, codec)
+
+
+def write_json(
+    data: Any, out: BinaryIO, codec: JsonCodec, compact: bool, stream: bool
+) -> None:
+    """Write one result, indented unless compact, entry by entry if stream."""
+    if stream:
+        dump_stream(data, out, codec, indent=not compact)
+    else:
+        out.write(codec.dumps(data, indent=not compact))
+    out.write(b"\n")
+
+
+def read_ndjson(stream: BinaryIO, codec: JsonCodec = default_codec) -> Iterator[dict]:
+    """Yield one answers document per non-empty line of an NDJSON stream."""
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield codec.loads(line)
+
+
+def stream_ndjson(
+    form_json: Union[dict, FormPlan],
+    stream: BinaryIO,
+    output: str,
+    jobs: Optional[int],
+    chunksize: int,
+    codec: JsonCodec = default_codec,
+) -> None:
+    """Walk every answers document of an NDJSON stream, one result line each."""
+    out = sys.stdout.buffer
+    for outputs in walk_forms(
+        form_json,
+        read_ndjson(stream, codec),
+        answersWRTMetadata,
+        workers=jobs,
+        chunksize=chunksize,
+        outputs=None if output == "all" else [output],
+    ):
+        if output == "all":
+            result = dict(zip(OUTPUT_NAMES, outputs))
+        else:
+            result = outputs[OUTPUT_NAMES.index(output)]
+        out.write(codec.dumps(result) + b"\n")
 
 
 def main():
-    if len(sys.argv) != 3:
-        print("Usage: python main.py <form_definition.json> <answers.json>")
+    parser = argparse.ArgumentParser(
+        usage="python main.py <form_definition.json> <answers.json>\n"
+        "       python main.py --ndjson [--plan-cache [--plan-cache-dir DIR]] "
+        "<form_definition.json> [answers.ndjson|-]"
+    )
+    parser.add_argument("form_file")
+    parser.add_argument("ans_file", nargs="?")
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="read one answers document per line (from stdin when the answers "
+        "file is omitted or -) and write one compact result line per document",
+    )
+    parser.add_argument(
+        "--output",
+        choices=OUTPUT_NAMES + ["all"],
+        default="constructed",
+        help="result written per line in --ndjson mode",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=None, help="worker processes for --ndjson"
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=64,
+        help="documents sent to a worker at a time with --jobs",
+    )
+    parser.add_argument(
+        "--json-backend",
+        choices=sorted(codecs),
+        default=default_codec.name,
+        help="JSON library used to read and write (default: fastest installed)",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="write the result as compact JSON, without the heading",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="write the result one top-level entry at a time instead of "
+        "encoding it whole",
+    )
+    parser.add_argument(
+        "--plan-cache",
+        action="store_true",
+        help="with --ndjson, load the compiled form from the plan cache, "
+        "compiling and storing it on a miss",
+    )
+    parser.add_argument(
+        "--plan-cache-dir",
+        metavar="DIR",
+        default=str(default_cache_dir()),
+        help="directory of the plan cache (default: %(default)s)",
+    )
+    args = parser.parse_args()
+    codec = codecs[args.json_backend]
+
+    if args.ndjson and args.plan_cache:
+        form_json: Union[dict, FormPlan] = cached_compile_file(
+            args.form_file, args.plan_cache_dir, codec
+        )
+    else:
+        form_json = load_json(args.form_file, codec)
+
+    if args.ndjson:
+        if args.ans_file in (None, "-"):
+            stream_ndjson(
+                form_json,
+                sys.stdin.buffer,
+                args.output,
+                args.jobs,
+                args.chunksize,
+                codec,
+            )
+        else:
+            with open(args.ans_file, "rb") as f:
+                stream_ndjson(
+                    form_json, f, args.output, args.jobs, args.chunksize, codec
+                )
+        return
+
+    if args.ans_file is None:
+        parser.print_usage()
         sys.exit(1)
 
-    form_file = sys.argv[1]
-    ans_file = sys.argv[2]
-
-    form_json = load_json(form_file)
-    ans_json = load_json(ans_file)
-    answersWRTMetadata = {
-        "company_name": ["Bus Alpha"],
-        "vat_id": ["f90s78dofjk"],
-        "customer_number": ["lsdufo7s9dfu7"],
-        "gln": [12345],
-        "checkin_format": ["pdf"],
-        "checkin_channel": ["email"],
-        "responsible_person_at_bp": ["tester"],
-        "email_of_responsible_person_at_bp": ["tester@email.com"],
-    }
+    ans_json = load_json(args.ans_file, codec)
 
     metadata, nested, flat, possible, constructed = walk_form(
-        form_json, ans_json, answersWRTMetadata
+        form_json, ans_json, answersWRTMetadata, outputs=["constructed"]
     )
 
     # print("\n============ Metadata ============\n")
@@ -51,8 +182,9 @@ def main():
     # print("\n============ Possible ============\n")
     # print(json.dumps(possible, indent=2))
 
-    print("\n============ Constructed ============\n")
-    print(json.dumps(constructed, indent=2))
+    if not args.compact:
+        print("\n============ Constructed ============\n", flush=True)
+    write_json(constructed, sys.stdout.buffer, codec, args.compact, args.stream)
     # with open("constructed.json", "w", encoding="utf-8") as f:
     #     json.dump(constructed, f, ensure_ascii=False, indent=4)
 
@@ -0,0 +1,37 @@
+import pytest
+
+from form.complete import is_complete, missing_required
+from form.constant import form_context_split_str
+
+FORM = {
+    "id": "F",
+    "phases": [
+        {
+            "id": "p",
+            "sections": [
+                {
+                    "id": "s",
+                    "fields": [
+                        {"id": "name", "type": "text", "required": True},
+                        {"id": "note", "type": "text"},
+                    ],
+                }
+            ],
+        }
+    ],
+}
+NAME = form_context_split_str.join(["F", "p", "s", "name"])
+
+
+@pytest.mark.parametrize("value", [[], [""], [None], ["  "], ["", None]])
+def test_blank_answers_are_missing(value):
+    answers = {NAME: value}
+    assert missing_required(FORM, answers) == [NAME]
+    assert not is_complete(FORM, answers)
+
+
+@pytest.mark.parametrize("value", [["Ada"], ["", "Ada"], [0], [False]])
+def test_non_blank_answers_are_answered(value):
+    answers = {NAME: value}
+    assert missing_required(FORM, answers) == []
+    assert is_complete(FORM, answers)
@@ -0,0 +1,43 @@
+from form.complete import iter_visible_required_fields
+from form.constant import form_context_split_str
+from form.defs import (
+    RequiredFieldCache,
+    collect_visible_required_fields_from_phases,
+)
+
+
+def _trigger_chain(depth: int) -> dict:
+    # a required text field per level, each triggering the next level's section
+    field = None
+    for level in range(depth, -1, -1):
+        parent = {"id": f"f{level}", "type": "text", "required": True}
+        if field is not None:
+            parent["triggers"] = [
+                {"id": f"t{level}", "type": "section", "fields": [field]}
+            ]
+        field = parent
+    return {
+        "id": "F",
+        "phases": [{"id": "p", "sections": [{"id": "s", "fields": [field]}]}],
+    }
+
+
+def test_deep_trigger_chain():
+    depth = 1500
+    form = _trigger_chain(depth)
+    cache = RequiredFieldCache()
+
+    required = collect_visible_required_fields_from_phases(
+        form, form["phases"], form["id"], {}, cache
+    )
+
+    assert len(required) == depth + 1
+    assert required[-1].split(form_context_split_str)[-1] == f"f{depth}"
+    assert required == list(iter_visible_required_fields(form, {}))
+    # the second collection is served from the cache
+    assert (
+        collect_visible_required_fields_from_phases(
+            form, form["phases"], form["id"], {}, cache
+        )
+        == required
+    )
@@ -0,0 +1,64 @@
+from form.compiled import walk_compiled
+from form.constant import form_context_split_str
+from form.defs import get_form_def
+from form.form import walk_form
+from form.plan import compile_form
+
+
+def _dependent_chain(depth: int) -> dict:
+    # each level's field triggers the next level's section and is only visible
+    # once the field of the level above is answered
+    field = None
+    for level in range(depth, -1, -1):
+        parent: dict = {"id": f"f{level}", "type": "text"}
+        if level:
+            path = ["p", "s", *(f"t{i}" for i in range(level - 1)), f"f{level - 1}"]
+            parent["dependency"] = [{"type": "visibility", "path": path}]
+        if field is not None:
+            parent["triggers"] = [
+                {"id": f"t{level}", "type": "section", "fields": [field]}
+            ]
+        field = parent
+    return {
+        "id": "F",
+        "phases": [{"id": "p", "sections": [{"id": "s", "fields": [field]}]}],
+    }
+
+
+def _answer_all(depth: int) -> dict:
+    answers = {}
+    context = form_context_split_str.join(["F", "p", "s"])
+    for level in range(depth + 1):
+        answers[context + form_context_split_str + f"f{level}"] = ["x"]
+        context += form_context_split_str + f"t{level}"
+    return answers
+
+
+def test_dependent_chain_matches_walk_form():
+    form = _dependent_chain(30)
+    answers = _answer_all(30)
+
+    assert walk_compiled(compile_form(form), answers, None) == walk_form(
+        form, answers, None
+    )
+
+
+def test_deep_dependent_chain():
+    depth = 1500
+    form = _dependent_chain(depth)
+    plan = compile_form(form)
+
+    # each field is read by the field one level below it only
+    fields = [node for node in plan.nodes if node.kind == "field"]
+    for above, below in zip(fields, fields[1:]):
+        assert plan.dependents[above.key] == (below.index,)
+
+    # the parent prefixes resolve to the definitions get_form_def finds
+    for parent in fields[-1].dependencies[0].parents[::100]:
+        definition = get_form_def(parent.key, form, use_cache=False)
+        assert parent.node == (-1 if definition is None else plan.by_key[parent.key])
+        if definition is not None:
+            assert plan.nodes[parent.node].id == definition["id"]
+
+    _, _, flat, _, _ = walk_compiled(plan, _answer_all(depth), None)
+    assert len(flat) == depth + 1